@@ -1,106 +1,13 @@
-import graphviz
 from PyQt5.QtWidgets import (QApplication, QWidget, QPushButton, QVBoxLayout, 
                             QHBoxLayout, QTextEdit, QLabel, QMainWindow, QScrollArea,
-                            QSizePolicy, QFileDialog, QMessageBox, QGroupBox)
+                            QSizePolicy, QFileDialog, QMessageBox, QGroupBox, QCheckBox)
 from PyQt5.QtGui import QPixmap, QFont, QColor, QIcon
-from PyQt5.QtCore import Qt, QByteArray, QSize
-import heapq
-from collections import defaultdict
-
-class HuffmanCoding:
-    """Huffman Coding implementation for text compression and decompression."""
-    
-    def __init__(self):
-        """Initialize Huffman tree and code dictionaries."""
-        self.huffman_tree = None
-        self.codes = {}       # Character to binary code mapping
-        self.reverse_codes = {}  # Binary code to character mapping
-
-    class Node:
-        """Node class for Huffman Tree nodes."""
-        def __init__(self, char, freq):
-            self.char = char  # Character (None for internal nodes)
-            self.freq = freq  # Frequency of character/subtree
-            self.left = None  # Left child
-            self.right = None # Right child
-
-        def __lt__(self, other):
-            """Comparison method for priority queue."""
-            return self.freq < other.freq
-
-    def build_tree(self, text):
-        """Build Huffman tree from input text."""
-        # Calculate character frequencies
-        frequency = defaultdict(int)
-        for char in text:
-            frequency[char] += 1
-
-        # Create priority queue of leaf nodes
-        priority_queue = [self.Node(char, freq) for char, freq in frequency.items()]
-        heapq.heapify(priority_queue)
-
-        # Build tree by merging nodes until one remains
-        while len(priority_queue) > 1:
-            left = heapq.heappop(priority_queue)
-            right = heapq.heappop(priority_queue)
-            merged = self.Node(None, left.freq + right.freq)
-            merged.left = left
-            merged.right = right
-            heapq.heappush(priority_queue, merged)
-
-        # The last node is the root of the Huffman tree
-        self.huffman_tree = priority_queue[0] if priority_queue else None
-        self.codes = {}
-        self.reverse_codes = {}
-        self.generate_codes(self.huffman_tree, "")
-
-    def generate_codes(self, node, current_code):
-        """Recursively generate binary codes for characters."""
-        if node is not None:
-            if node.char is not None:  # Leaf node with character
-                self.codes[node.char] = current_code
-                self.reverse_codes[current_code] = node.char
-            # Traverse left and right children
-            self.generate_codes(node.left, current_code + "0")
-            self.generate_codes(node.right, current_code + "1")
-
-    def encode(self, text):
-        """Encode text using generated Huffman codes."""
-        return "".join(self.codes[char] for char in text) if self.codes else ""
-
-    def decode(self, encoded_text):
-        """Decode binary string using Huffman codes."""
-        decoded_text = []
-        current_code = ""
-        for bit in encoded_text:
-            current_code += bit
-            if current_code in self.reverse_codes:
-                decoded_text.append(self.reverse_codes[current_code])
-                current_code = ""
-        return "".join(decoded_text)
-
-    def visualize_tree(self):
-        """Generate visual representation of Huffman tree using Graphviz."""
-        if not self.huffman_tree:
-            return None
-
-        dot = graphviz.Digraph(comment="Huffman Tree")
-        
-        def add_node(node, parent_name=None):
-            """Recursively add nodes and edges to Graphviz graph."""
-            if node:
-                node_id = str(id(node))  # Unique identifier for node
-                # Label format: character/frequency for leaves, internal nodes show frequency
-                label = f"{node.char}\n{node.freq}" if node.char else f"Internal\n{node.freq}"
-                dot.node(node_id, label)
-                if parent_name is not None:
-                    dot.edge(parent_name, node_id)
-                add_node(node.left, node_id)
-                add_node(node.right, node_id)
-
-        add_node(self.huffman_tree)
-        return dot.pipe(format="png")  # Return PNG image data
+from PyQt5.QtCore import Qt, QByteArray, QSize, QTimer
+from instrumentation import PROFILER
+from huffman_codec import HuffmanCoding, IncrementalHuffman
 
+LIVE_DELAY_MS = 300        # Quiet time after the last keystroke before a live update
+LIVE_PREVIEW_BITS = 20000  # Encoded bits shown in live mode; the full text stays savable via Build Tree
 
 class App(QMainWindow):
     """Main GUI application for Huffman Coding visualization."""
@@ -109,6 +16,13 @@ class App(QMainWindow):
         super().__init__()
         self.resize(1200, 800)
         self.current_image_data = None  # Stores current tree visualization PNG data
+        self.live = None  # IncrementalHuffman state while live mode is on
+        
+        # Debounce timer: live updates run once typing pauses
+        self.live_timer = QTimer(self)
+        self.live_timer.setSingleShot(True)
+        self.live_timer.setInterval(LIVE_DELAY_MS)
+        self.live_timer.timeout.connect(self.live_update)
         
         # Central Widget Setup
         central_widget = QWidget()
@@ -127,6 +41,10 @@ class App(QMainWindow):
         self.btn_save_text.clicked.connect(self.save_text)
         self.btn_save_image.clicked.connect(self.save_image)
         self.btn_load.clicked.connect(self.load_file)
+        self.chk_profile.toggled.connect(self.toggle_profiling)
+        self.btn_export_timing.clicked.connect(self.export_timings)
+        self.chk_live.toggled.connect(self.toggle_live)
+        self.input_text.textChanged.connect(self.schedule_live_update)
 
     def create_input_panel(self):
         """Create left panel with input controls and results display."""
@@ -162,6 +80,9 @@ class App(QMainWindow):
         btn_container.addWidget(self.btn_save_text)
         btn_container.addWidget(self.btn_save_image)
         
+        # Live mode re-encodes while typing instead of waiting for "Build Tree"
+        self.chk_live = QCheckBox("Live Mode")
+        
         # Output display area
         self.output_display = QTextEdit()
         self.output_display.setPlaceholderText("Output")
@@ -170,6 +91,7 @@ class App(QMainWindow):
         input_panel.addWidget(header)
         input_panel.addWidget(self.input_text)
         input_panel.addLayout(btn_container)
+        input_panel.addWidget(self.chk_live)
         input_panel.addWidget(self.output_display)
         
         self.main_layout.addLayout(input_panel, 35)  # 35% width allocation
@@ -192,10 +114,20 @@ class App(QMainWindow):
         self.lbl_compressed = QLabel("Compressed Size: -")
         self.lbl_ratio = QLabel("Compression Ratio: -")
         
-        for label in [self.lbl_original, self.lbl_compressed, self.lbl_ratio]:
+        self.lbl_timing = QLabel("Phase Timings: -")
+        
+        for label in [self.lbl_original, self.lbl_compressed, self.lbl_ratio, self.lbl_timing]:
             label.setFont(QFont("Segoe UI", 10))
             stats_layout.addWidget(label)
         
+        # Timing controls (recording is off by default to keep overhead near zero)
+        timing_controls = QHBoxLayout()
+        self.chk_profile = QCheckBox("Record Timings")
+        self.btn_export_timing = QPushButton("Export Timings")
+        timing_controls.addWidget(self.chk_profile)
+        timing_controls.addWidget(self.btn_export_timing)
+        stats_layout.addLayout(timing_controls)
+        
         stats_group.setLayout(stats_layout)
         
         vis_panel.addWidget(self.tree_label, 70)  # 70% height for visualization
@@ -246,35 +178,85 @@ class App(QMainWindow):
             return
             
         try:
+            PROFILER.clear()
             huffman = HuffmanCoding()
             huffman.build_tree(text)
-            
-            # Calculate compression statistics
-            original_size = len(text.encode('utf-8')) * 8  # in bits
             encoded_text = huffman.encode(text)
-            compressed_size = len(encoded_text)  # in bits
-            
-            ratio = (1 - compressed_size/original_size) * 100 if original_size else 0
-            
-            # Update statistics labels
-            self.lbl_original.setText(f"Original Size: {original_size//8} bytes")
-            self.lbl_compressed.setText(f"Compressed Size: {(compressed_size + 7)//8} bytes")
-            self.lbl_ratio.setText(f"Compression Ratio: {ratio:.2f}%")
-            
-            # Display results
-            output = f"Encoded Text:\n{encoded_text}\n\nHuffman Codes:\n"
-            output += "\n".join([f"'{k}': {v}" for k, v in huffman.codes.items()])
-            self.output_display.setPlainText(output)
+            self.show_results(text, encoded_text, huffman.codes)
             
             # Update tree visualization
             self.update_tree_visualization(huffman)
+            if PROFILER.enabled:
+                self.lbl_timing.setText("Phase Timings:\n" + PROFILER.summary())
 
         except Exception as e:
             QMessageBox.critical(self, "Error", f"An error occurred: {str(e)}")
 
-    def update_tree_visualization(self, huffman):
+    def show_results(self, text, encoded_text, codes, preview_bits=None):
+        """Update statistics labels and the output display."""
+        # Calculate compression statistics
+        original_size = len(text.encode('utf-8')) * 8  # in bits
+        compressed_size = len(encoded_text)  # in bits
+        
+        ratio = (1 - compressed_size/original_size) * 100 if original_size else 0
+        
+        # Update statistics labels
+        self.lbl_original.setText(f"Original Size: {original_size//8} bytes")
+        self.lbl_compressed.setText(f"Compressed Size: {(compressed_size + 7)//8} bytes")
+        self.lbl_ratio.setText(f"Compression Ratio: {ratio:.2f}%")
+        
+        # Display results
+        shown = encoded_text
+        if preview_bits is not None and len(encoded_text) > preview_bits:
+            shown = f"{encoded_text[:preview_bits]}... ({len(encoded_text) - preview_bits} more bits)"
+        output = f"Encoded Text:\n{shown}\n\nHuffman Codes:\n"
+        output += "\n".join([f"'{k}': {v}" for k, v in codes.items()])
+        self.output_display.setPlainText(output)
+
+    def toggle_live(self, checked):
+        """Start or stop live re-encoding of the input text."""
+        if checked:
+            self.live = IncrementalHuffman()
+            self.live_update()
+        else:
+            self.live_timer.stop()
+            self.live = None
+
+    def schedule_live_update(self):
+        """Restart the debounce timer on every edit while live mode is on."""
+        if self.live is not None:
+            self.live_timer.start()
+
+    def live_update(self):
+        """Apply the edits since the last update to the incremental encoder."""
+        if self.live is None:
+            return
+        text = self.input_text.toPlainText()
+        try:
+            PROFILER.clear()
+            codes_changed = self.live.update(text)
+            if not text:
+                self.output_display.clear()
+                self.tree_label.clear()
+                self.current_image_data = None
+                self.lbl_original.setText("Original Size: -")
+                self.lbl_compressed.setText("Compressed Size: -")
+                self.lbl_ratio.setText("Compression Ratio: -")
+                return
+            self.show_results(text, self.live.encoded, self.live.huffman.codes, LIVE_PREVIEW_BITS)
+            # Graphviz rendering is the slowest step, so only redraw when the tree shape changed;
+            # frequencies are left off the labels since they change on every edit
+            if codes_changed or not self.current_image_data:
+                self.update_tree_visualization(self.live.huffman, show_frequencies=False)
+            if PROFILER.enabled:
+                self.lbl_timing.setText("Phase Timings:\n" + PROFILER.summary())
+        except Exception as e:
+            self.chk_live.setChecked(False)
+            QMessageBox.critical(self, "Error", f"Live mode stopped: {str(e)}")
+
+    def update_tree_visualization(self, huffman, show_frequencies=True):
         """Update the tree visualization image from Huffman tree data."""
-        image_data = huffman.visualize_tree()
+        image_data = huffman.visualize_tree(show_frequencies)
         self.current_image_data = image_data
         
         if image_data:
@@ -298,6 +280,30 @@ class App(QMainWindow):
         self.lbl_original.setText("Original Size: -")
         self.lbl_compressed.setText("Compressed Size: -")
         self.lbl_ratio.setText("Compression Ratio: -")
+        self.lbl_timing.setText("Phase Timings: -")
+
+    def toggle_profiling(self, checked):
+        """Turn per-phase timing (with allocation peaks and cProfile) on or off."""
+        if checked:
+            PROFILER.enable(track_memory=True, cprofile=True)
+        else:
+            PROFILER.disable()
+
+    def export_timings(self):
+        """Save recorded phase timings as JSON or a cProfile dump."""
+        if not PROFILER.records:
+            QMessageBox.warning(self, "Error", "No timings recorded yet! Enable Record Timings and build a tree.")
+            return
+        options = QFileDialog.Options()
+        file_name, _ = QFileDialog.getSaveFileName(
+            self, "Export Timings", "huffman_timings.json",
+            "JSON Files (*.json);;cProfile Stats (*.prof)", options=options)
+        if file_name:
+            try:
+                PROFILER.export(file_name)
+                QMessageBox.information(self, "Success", "Timings exported successfully!")
+            except Exception as e:
+                QMessageBox.critical(self, "Error", f"Failed to export timings: {str(e)}")
 
     def save_text(self):
         """Save current results (encoded text and codes) to a file."""
@@ -1,15 +1,20 @@
+import sys
+from library_storage import CirculationError, open_storage
+
 def Database():
-    import mysql.connector as ms
-    cobj=ms.connect(host='localhost',user='root',passwd='****')
-    if cobj.is_connected():
-        cur=cobj.cursor()
-        cur.execute('CREATE DATABASE IF NOT EXISTS libt')
-        cur.execute('USE libt')
-        cur.execute('CREATE TABLE IF NOT EXISTS bookrec (bno int(10), bname varchar(100), auth varchar(100), price int(10), qty int(10))')
-        cur.execute('CREATE TABLE IF NOT EXISTS member (mno int(5), mname varchar(50), dom date, cont varchar(50))')
-        cur.execute('CREATE TABLE IF NOT EXISTS rec (bno int(5), mno varchar(50), dos date, stat varchar(20))')
-        cur.close()
-        cobj.close()
+    #MySQL by default; "sqlite [path]" on the command line runs without a server
+    if len(sys.argv)>1 and sys.argv[1]=='sqlite':
+        path = sys.argv[2] if len(sys.argv)>2 else 'libt.db'
+        return open_storage('sqlite', path=path)
+    return open_storage('mysql')
+
+def show(data):
+    if len(data)==0:
+        print('NO RECORDS FOUND')
+    else:
+        for i in data:
+            print(i)
+            print('RECORD(S) FOUND')
 
 def insb():
     #insert book
@@ -18,17 +23,13 @@ def insb():
     auth=input("Enter book's author:")
     price=int(input("Enter book's price:"))
     qty=int(input('Enter quantity purchased:'))
-    qry="INSERT INTO bookrec VALUES ({},'{}','{}',{},{})".format(bno,bname,auth,price,qty)
-    cur.execute(qry)
-    cobj.commit()
+    db.insert_book(bno,bname,auth,price,qty)
     print('RECORD INSERTED SUCCESSFULLY')
     
 def delb():
     #delete book
-    bno = input("Enter Book Code of Book to be deleted from the Library:")
-    qry ="DELETE FROM bookrec WHERE bno = {}".format(bno)
-    cur.execute(qry)
-    cobj.commit()
+    bno = int(input("Enter Book Code of Book to be deleted from the Library:"))
+    db.delete_book(bno)
     print('RECORD DELETED SUCCESSFULLY')
 
 def updb():
@@ -38,37 +39,24 @@ def updb():
     bname = input("Enter Book Name:")
     auth = input("Enter Book Author's Name:")
     price = int(input("Enter Book Price:"))
-    qty = int(input("Enter Quantity purchased:"))
-    Qry ="UPDATE bookrec SET bname='{}', auth='{}', price={}, qty={} WHERE bno={}".format(bname, auth, price, qty, bno)
-    cur.execute(Qry)
-    cobj.commit()
+    qty = int(input("Enter total copies held (including issued ones):"))
+    #copies currently issued are subtracted, so only the rest go back on the shelf
+    try:
+        db.update_book(bno, bname, auth, price, qty)
+    except CirculationError as e:
+        print(e)
+        return
     print('RECORD UPDATED SUCCESSFULLY')
     
 def serbn():
     #search by book name
     bname = input('Enter book name to search:')
-    Qry="SELECT * FROM bookrec WHERE bname = '{}'".format(bname)
-    cur.execute(Qry)
-    data=cur.fetchall()
-    if len(data)==0:
-        print('NO RECORDS FOUND')
-    else:
-        for i in data:
-            print(i)
-            print('RECORD(S) FOUND')
+    show(db.search_by_name(bname))
 
 def serba():
     #search by author
     auth = input('Enter author to search:')
-    Qry="SELECT * FROM bookrec WHERE auth='{}'".format(auth)
-    cur.execute(Qry)
-    data=cur.fetchall()
-    if len(data)==0:
-        print('NO RECORDS FOUND')
-    else:
-        for i in data:
-            print(i)
-            print('RECORD(S) FOUND')
+    show(db.search_by_author(auth))
         
 def im():
     #insert member
@@ -80,17 +68,13 @@ def im():
     MM = int(input("Enter Month:"))
     YY = int(input("Enter Year:"))
     cont = input("Enter contact details of member:")
-    Qry ="INSERT INTO member VALUES({}, '{}', '{}', '{}')".format(mno,mname,date(YY,MM,DD),cont)
-    cur.execute(Qry)
-    cobj.commit()
+    db.insert_member(mno,mname,date(YY,MM,DD),cont)
     print('MEMBER REGISTRATION DONE')
 
 def dm():
     #delete member
     mno = int(input("Enter Member number to be deleted from the Library:"))
-    Qry ="DELETE FROM member WHERE mno = {}".format(mno)
-    cur.execute(Qry)
-    cobj.commit()
+    db.delete_member(mno)
     print('MEMBER DELETED SUCCESSFULLY')
 
 def um():
@@ -105,68 +89,52 @@ def um():
     YY = int(input("Enter Year:"))
     cont = input("Enter Member's contact details:")
     DOM = date(YY,MM,DD)
-    Qry ="UPDATE member SET mname='{}', DOM='{}', cont='{}' WHERE mno={}".format(mname,DOM,cont,mno)
-    cur.execute(Qry)
-    cobj.commit()
+    db.update_member(mno,mname,DOM,cont)
     print('MEMBER DETAILS UPDATED SUCCESSFULLY')
     
 def sm():
     #search member
     mno=int(input('Enter member number to search:'))
-    Qry="SELECT * FROM member WHERE mno={}".format(mno)
-    cur.execute(Qry)
-    data=cur.fetchall()
-    if len(data)==0:
-        print('NO RECORDS FOUND')
-    else:
-        for i in data:
-            print(i)
-            print('RECORD(S) FOUND')
+    show(db.search_member(mno))
+
+def bnos(prompt):
+    return [int(b) for b in input(prompt).replace(',',' ').split()]
 
 def ib():
-    #issue book
+    #issue book(s), all in one transaction
     from datetime import date
-    bno = int(input("Enter Book number to issue:"))
+    books = bnos("Enter Book number(s) to issue (comma separated):")
     mno = int(input("Enter Member number:"))
     print("Enter Date Issue (Date,Month and Year separately):")
     DD = int(input("Enter Date:"))
     MM = int(input("Enter Month:"))
     YY = int(input("Enter Year:"))
-    stat = input('Write(Reading):')
-    #Qry = 
-    cur.execute("INSERT INTO rec VALUES({}, {}, '{}', '{}')".format(bno,mno,date(YY,MM,DD),stat))
-    cobj.commit()
-    print('BOOK ISSUED')
+    #takes one copy off the shelf only if one is left, so two desks cannot issue the last copy
+    for r in db.issue_books(mno,books,date(YY,MM,DD)):
+        print(r['bno'], 'BOOK ISSUED' if r['ok'] else r['error'])
     
 def rb():
-    #return book
-    bno = int(input("Enter Book number to return:"))
+    #return book(s), all in one transaction
+    books = bnos("Enter Book number(s) to return (comma separated):")
     mno = int(input("Enter Member number:"))
     stat = input('Write(Lost,Returned):')
-    Qry= "UPDATE rec SET stat='{}' WHERE mno = {} AND bno = {}".format(stat,mno,bno)
-    cur.execute(Qry)
-    cobj.commit()
-    print('BOOK RETURNED')
+    #a lost copy never comes back to the shelf
+    try:
+        results = db.return_books(mno,books,stat)
+    except CirculationError as e:
+        print(e)
+        return
+    for r in results:
+        print(r['bno'], 'BOOK RETURNED' if r['ok'] else r['error'])
 
 def sib():
     #search issued books
     stat=input('Enter Lost, Returned, Reading books:')
-    Qry = "SELECT * FROM rec WHERE stat='{}'".format(stat)
-    cur.execute(Qry)
-    data=cur.fetchall()
-    if len(data)==0:
-        print('NO RECORDS FOUND')
-    else:
-        for i in data:
-            print(i)
-            print('RECORD(S) FOUND')
+    show(db.search_issued(stat))
     
-Database()
-import mysql.connector as ms
-cobj=ms.connect(host='localhost',user='root',passwd='****',database='libt')
-if cobj.is_connected():
+db=Database()
+if db:
     print('WELCOME TO LIBRARY MANAGEMENT SOFTWARE')
-    cur=cobj.cursor()
     print("\t1.  Insert a book's data")
     print("\t2.  Update a book's data")
     print("\t3.  Delete a book's data")
@@ -215,7 +183,6 @@ if cobj.is_connected():
         elif choice==11:
             sib()
         elif choice==12:
-            cur.close()
-            cobj.close()
+            db.close()
             break
         choice = int(input('Enter your choice (Sr.No.):'))
@@ -1,73 +1,11 @@
 from PyQt5.QtWidgets import (QApplication, QMainWindow, QWidget, QVBoxLayout, QHBoxLayout,
                              QTextEdit, QPushButton, QLabel, QScrollArea, QListWidget,
-                             QListWidgetItem, QGroupBox, QMessageBox)
+                             QListWidgetItem, QGroupBox, QMessageBox, QCheckBox,
+                             QFileDialog)
 from PyQt5.QtGui import QFont, QIcon, QPixmap, QColor, QTextCursor
 from PyQt5.QtCore import Qt, QSize
-
-class RLE:
-    def __init__(self):
-        self.encoding_steps = []  # Stores each step of the encoding process
-        self.original_size = 0    # Original text character count
-        self.compressed_size = 0  # Compressed text character count
-
-    def encode(self, text):
-        """Encodes input text using RLE and tracks compression steps"""
-        if not text:
-            return ""
-        
-        self.encoding_steps = []
-        self.original_size = len(text)  # Store original length
-
-        encoded = []  # List to hold encoded parts
-        current_char = text[0]
-        count = 1
-
-        # Iterate through characters to find consecutive runs
-        for char in text[1:]:
-            if char == current_char:
-                count += 1
-            else:
-                # Add encoded part and record step
-                encoded_part = f"{count}{current_char}"
-                encoded.append(encoded_part)
-                self.encoding_steps.append(f"'{current_char * count}' → '{encoded_part}'")
-                current_char = char
-                count = 1
-        
-        # Add the last character group
-        encoded_part = f"{count}{current_char}"
-        encoded.append(encoded_part)
-        self.encoding_steps.append(f"'{current_char * count}' → '{encoded_part}'")
-        
-        compressed = "".join(encoded)
-        self.compressed_size = len(compressed)  # Store compressed length
-        return compressed
-
-    def decode(self, encoded_text):
-        """Decodes valid RLE encoded text back to original"""
-        decoded = []
-        i = 0
-        
-        try:
-            while i < len(encoded_text):
-                # Extract count digits
-                count_str = ""
-                while i < len(encoded_text) and encoded_text[i].isdigit():
-                    count_str += encoded_text[i]
-                    i += 1
-
-                if i >= len(encoded_text):
-                    break
-
-                # Get character and repeat count
-                char = encoded_text[i]
-                count = int(count_str) if count_str else 1
-                decoded.append(char * count)
-                i += 1
-        except:
-            raise ValueError("Invalid RLE format")
-        
-        return "".join(decoded)
+from instrumentation import PROFILER
+from rle_codec import RLE
 
 # Main application window class
 class App(QMainWindow):
@@ -93,6 +31,8 @@ class App(QMainWindow):
         self.encode_btn.clicked.connect(self.encode_text)
         self.decode_btn.clicked.connect(self.decode_text)
         self.clear_btn.clicked.connect(self.clear_all)
+        self.profile_check.toggled.connect(self.toggle_profiling)
+        self.export_timing_btn.clicked.connect(self.export_timings)
 
         # Apply modern styling
         self.apply_styles()
@@ -141,14 +81,22 @@ class App(QMainWindow):
         self.original_size_label = QLabel("Original Size: -")
         self.compressed_size_label = QLabel("Compressed Size: -")
         self.ratio_label = QLabel("Compression Ratio: -")
+        self.timing_label = QLabel("Phase Timings: -")
         
         # Configure statistic labels
         for label in [self.original_size_label, 
                      self.compressed_size_label,
-                     self.ratio_label]:
+                     self.ratio_label,
+                     self.timing_label]:
             label.setFont(QFont("Segoe UI", 10))
             stats_layout.addWidget(label)
         
+        # Timing controls (recording is off by default to keep overhead near zero)
+        self.profile_check = QCheckBox("Record Timings")
+        self.export_timing_btn = QPushButton("Export Timings")
+        stats_layout.addWidget(self.profile_check)
+        stats_layout.addWidget(self.export_timing_btn)
+        
         stats_group.setLayout(stats_layout)
         
         # Assemble visualization panel
@@ -220,6 +168,7 @@ class App(QMainWindow):
             
         try:
             # Process encoding
+            PROFILER.clear()
             encoded = self.rle.encode(text)
             decoded = self.rle.decode(encoded)  # Verify encoding
             
@@ -240,6 +189,7 @@ class App(QMainWindow):
             # Calculate compression ratio
             ratio = (1 - self.rle.compressed_size/self.rle.original_size) * 100
             self.ratio_label.setText(f"Compression Ratio: {ratio:.1f}%")
+            self.show_timings()
             
             # Warn if compression is inefficient
             if self.rle.compressed_size > self.rle.original_size:
@@ -259,6 +209,7 @@ class App(QMainWindow):
             
         try:
             # Process decoding
+            PROFILER.clear()
             decoded = self.rle.decode(text)
             self.output_display.setPlainText(f"Decoded Result:\n{decoded}")
             
@@ -267,6 +218,7 @@ class App(QMainWindow):
             self.original_size_label.setText("Original Size: -")
             self.compressed_size_label.setText("Compressed Size: -")
             self.ratio_label.setText("Compression Ratio: -")
+            self.show_timings()
             
         except Exception as e:
             self.show_error(f"Decoding error: {str(e)}")
@@ -279,6 +231,34 @@ class App(QMainWindow):
         self.original_size_label.setText("Original Size: -")
         self.compressed_size_label.setText("Compressed Size: -")
         self.ratio_label.setText("Compression Ratio: -")
+        self.timing_label.setText("Phase Timings: -")
+
+    def toggle_profiling(self, checked):
+        """Turns per-phase timing (with allocation peaks and cProfile) on or off"""
+        if checked:
+            PROFILER.enable(track_memory=True, cprofile=True)
+        else:
+            PROFILER.disable()
+
+    def show_timings(self):
+        """Shows the phases recorded for the last operation"""
+        if PROFILER.enabled:
+            self.timing_label.setText("Phase Timings:\n" + PROFILER.summary())
+
+    def export_timings(self):
+        """Saves recorded phase timings as JSON or a cProfile dump"""
+        if not PROFILER.records:
+            self.show_error("No timings recorded yet! Enable Record Timings and encode some text.")
+            return
+        file_name, _ = QFileDialog.getSaveFileName(
+            self, "Export Timings", "rle_timings.json",
+            "JSON Files (*.json);;cProfile Stats (*.prof)")
+        if file_name:
+            try:
+                PROFILER.export(file_name)
+                QMessageBox.information(self, "Success", "Timings exported successfully!")
+            except Exception as e:
+                self.show_error(f"Failed to export timings: {str(e)}")
 
     def show_error(self, message):
         """Displays error messages in a dialog"""
@@ -0,0 +1,176 @@
+"""Command-line interface for the Huffman and RLE codecs.
+
+Compresses or decompresses files and whole directory trees without
+loading PyQt5 or Graphviz:
+
+    python codec_cli.py compress docs/ -o packed/ --workers 4
+    python codec_cli.py decompress packed/ -o docs_copy/
+    python codec_cli.py compress logs/ -o packed/ --codebook logs.codebook
+    python codec_cli.py train logs/ -o logs.codebook
+
+Huffman output uses the seekable archive format (.huf), or the codebook
+format (.hcb) when --codebook is given; RLE output is text (.rle) in an
+escaped form that, unlike the GUI's display format, survives digits. Files
+are read as UTF-8, with undecodable bytes carried through unchanged.
+Existing output files are only overwritten with --force.
+"""
+import argparse
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+SUFFIXES = {"huffman": ".huf", "codebook": ".hcb", "rle": ".rle"}
+ENCODING = dict(encoding="utf-8", errors="surrogateescape")
+
+
+def read_text(path):
+    with open(path, "r", newline="", **ENCODING) as f:
+        return f.read()
+
+
+def compress_file(src, dst, codec, codebook=None):
+    """Compress one file; returns (src, original bytes, compressed bytes)."""
+    text = read_text(src)
+    if codec == "rle":
+        from rle_codec import RLE
+        data = RLE.pack(text).encode(**ENCODING)
+    elif codebook:
+        from huffman_codec import HuffmanCodebook
+        data = HuffmanCodebook.load(codebook).pack(text)
+    else:
+        from huffman_codec import HuffmanCoding
+        data = HuffmanCoding().compress(text)
+    with open(dst, "wb") as f:
+        f.write(data)
+    return src, os.path.getsize(src), len(data)
+
+
+def decompress_file(src, dst, codec, codebook=None):
+    """Decompress one file; returns (src, compressed bytes, restored bytes)."""
+    with open(src, "rb") as f:
+        data = f.read()
+    if codec == "rle":
+        from rle_codec import RLE
+        text = RLE.unpack(data.decode(**ENCODING))
+    elif codebook:
+        from huffman_codec import HuffmanCodebook
+        text = HuffmanCodebook.load(codebook).unpack(data)
+    else:
+        from huffman_codec import HuffmanCoding
+        text = HuffmanCoding().decompress(data)
+    with open(dst, "w", newline="", **ENCODING) as f:
+        f.write(text)
+    return src, len(data), os.path.getsize(dst)
+
+
+def collect(paths, suffix=None):
+    """Yield (file, path relative to its input) for files and directory trees."""
+    for path in paths:
+        if os.path.isdir(path):
+            for root, _, files in os.walk(path):
+                for name in sorted(files):
+                    if suffix is None or name.endswith(suffix):
+                        full = os.path.join(root, name)
+                        yield full, os.path.relpath(full, path)
+        else:
+            yield path, os.path.basename(path)
+
+
+def plan(args):
+    """List (source, destination) pairs, creating output directories.
+
+    Also returns the inputs skipped because they already carry the codec's
+    suffix (when compressing), and (source, error) for files whose
+    destination exists, which are refused unless --force is given.
+    """
+    suffix = SUFFIXES["codebook" if args.codebook else args.codec]
+    jobs, skipped, refused = [], [], []
+    for src, rel in collect(args.paths, suffix if args.command == "decompress" else None):
+        if args.command == "compress":
+            if rel.endswith(suffix):
+                skipped.append(src)
+                continue
+            rel += suffix
+        elif rel.endswith(suffix):
+            rel = rel[:-len(suffix)]
+        else:
+            rel += ".out"
+        dst = os.path.join(args.output, rel) if args.output else os.path.join(os.path.dirname(src), os.path.basename(rel))
+        if os.path.exists(dst) and not args.force:
+            refused.append((src, FileExistsError(f"{dst} exists (use --force to overwrite)")))
+            continue
+        os.makedirs(os.path.dirname(dst) or ".", exist_ok=True)
+        jobs.append((src, dst))
+    return jobs, skipped, refused
+
+
+def run(args):
+    func = compress_file if args.command == "compress" else decompress_file
+    jobs, skipped, results = plan(args)
+    if args.verbose:
+        for src in skipped:
+            print(f"{src}: skipped, already compressed")
+    total_in = total_out = failed = 0
+    if args.workers > 1 and len(jobs) > 1:
+        with ProcessPoolExecutor(max_workers=args.workers) as pool:
+            futures = [(src, pool.submit(func, src, dst, args.codec, args.codebook)) for src, dst in jobs]
+            for src, future in futures:
+                try:
+                    results.append(future.result())
+                except Exception as e:
+                    results.append((src, e))
+    else:
+        for src, dst in jobs:
+            try:
+                results.append(func(src, dst, args.codec, args.codebook))
+            except Exception as e:
+                results.append((src, e))
+    for result in results:
+        if len(result) == 2:
+            failed += 1
+            print(f"{result[0]}: error: {result[1]}", file=sys.stderr)
+            continue
+        src, size_in, size_out = result
+        total_in += size_in
+        total_out += size_out
+        if args.verbose:
+            print(f"{src}: {size_in} -> {size_out} bytes")
+    print(f"{len(results) - failed} file(s), {total_in} -> {total_out} bytes"
+          + (f", {failed} failed" if failed else "") + (f", {len(skipped)} skipped" if skipped else ""))
+    return 1 if failed else 0
+
+
+def train(args):
+    from huffman_codec import HuffmanCodebook
+    codebook = HuffmanCodebook.train(read_text(src) for src, _ in collect(args.paths))
+    codebook.save(args.output)
+    print(f"Codebook {codebook.id} with {len(codebook.codes)} symbols saved to {args.output}")
+    return 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compress or decompress files with Huffman or RLE coding")
+    sub = parser.add_subparsers(dest="command", required=True)
+    for command in ("compress", "decompress"):
+        p = sub.add_parser(command)
+        p.add_argument("paths", nargs="+", help="Files or directories (processed recursively)")
+        p.add_argument("-o", "--output", help="Output directory (default: next to each input)")
+        p.add_argument("-c", "--codec", choices=["huffman", "rle"], default="huffman")
+        p.add_argument("--codebook", help="Use a trained Huffman codebook instead of per-file trees")
+        p.add_argument("-j", "--workers", type=int, default=os.cpu_count() or 1)
+        p.add_argument("-f", "--force", action="store_true", help="Overwrite existing output files")
+        p.add_argument("-v", "--verbose", action="store_true")
+    p = sub.add_parser("train", help="Train a Huffman codebook from sample files")
+    p.add_argument("paths", nargs="+")
+    p.add_argument("-o", "--output", required=True, help="Codebook file to write")
+    args = parser.parse_args(argv)
+
+    if args.command == "train":
+        return train(args)
+    if args.codebook and args.codec != "huffman":
+        parser.error("--codebook only applies to the huffman codec")
+    return run(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,423 @@
+"""Huffman coding codec, importable without PyQt5 or Graphviz.
+
+Graphviz is only imported when a tree is rendered, so batch jobs and the
+command-line interface pay no GUI start-up cost.
+"""
+import hashlib
+import heapq
+import json
+import mmap
+import os
+import struct
+from collections import Counter, defaultdict
+from instrumentation import PROFILER, timed
+
+ARCHIVE_MAGIC = b"HUF2"
+INDEX_ENTRY = struct.Struct(">QQ")  # Seek index entry: bit position, character offset
+CODEBOOK_MAGIC = b"HCB1"
+BLOCK_SIZE = 4096  # Symbols between two seek index entries
+ESCAPE = ""        # Codebook symbol announcing a raw code point (never a real character)
+CODEPOINT_BITS = 21
+LIVE_BLOCK_SIZE = 1024  # Characters per separately re-encodable block in live mode
+
+
+def pack_bits(bitstring):
+    """Pack a '0'/'1' string into bytes, zero-padding the last byte."""
+    padded = bitstring + "0" * (-len(bitstring) % 8)
+    return int(padded, 2).to_bytes(len(padded) // 8, "big") if padded else b""
+
+
+def unpack_bits(data):
+    """Unpack bytes into a '0'/'1' string of length 8 * len(data)."""
+    return bin(int.from_bytes(data, "big"))[2:].zfill(len(data) * 8) if data else ""
+
+
+class HuffmanCoding:
+    """Huffman Coding implementation for text compression and decompression."""
+    
+    def __init__(self):
+        """Initialize Huffman tree and code dictionaries."""
+        self.huffman_tree = None
+        self.codes = {}       # Character to binary code mapping
+        self.reverse_codes = {}  # Binary code to character mapping
+
+    class Node:
+        """Node class for Huffman Tree nodes."""
+        def __init__(self, char, freq):
+            self.char = char  # Character (None for internal nodes)
+            self.freq = freq  # Frequency of character/subtree
+            self.left = None  # Left child
+            self.right = None # Right child
+
+        def __lt__(self, other):
+            """Comparison method for priority queue."""
+            return self.freq < other.freq
+
+    @timed("build_tree", lambda self, text: len(text.encode("utf-8")))
+    def build_tree(self, text):
+        """Build Huffman tree from input text."""
+        # Calculate character frequencies
+        with PROFILER.phase("frequency_count"):
+            frequency = defaultdict(int)
+            for char in text:
+                frequency[char] += 1
+        self.build_tree_from_frequencies(frequency)
+
+    def build_tree_from_frequencies(self, frequency):
+        """Build Huffman tree from a symbol to frequency mapping."""
+        with PROFILER.phase("heap_build"):
+            # Create priority queue of leaf nodes
+            priority_queue = [self.Node(char, freq) for char, freq in frequency.items()]
+            heapq.heapify(priority_queue)
+
+            # Build tree by merging nodes until one remains
+            while len(priority_queue) > 1:
+                left = heapq.heappop(priority_queue)
+                right = heapq.heappop(priority_queue)
+                merged = self.Node(None, left.freq + right.freq)
+                merged.left = left
+                merged.right = right
+                heapq.heappush(priority_queue, merged)
+
+        # The last node is the root of the Huffman tree
+        self.huffman_tree = priority_queue[0] if priority_queue else None
+        self.codes = {}
+        self.reverse_codes = {}
+        # A tree of a single leaf still needs a one-bit code
+        root_is_leaf = self.huffman_tree is not None and self.huffman_tree.char is not None
+        with PROFILER.phase("generate_codes"):
+            self.generate_codes(self.huffman_tree, "0" if root_is_leaf else "")
+
+    def generate_codes(self, node, current_code):
+        """Recursively generate binary codes for characters."""
+        if node is not None:
+            if node.char is not None:  # Leaf node with character
+                self.codes[node.char] = current_code
+                self.reverse_codes[current_code] = node.char
+            # Traverse left and right children
+            self.generate_codes(node.left, current_code + "0")
+            self.generate_codes(node.right, current_code + "1")
+
+    @timed("encode", lambda self, text: len(text.encode("utf-8")))
+    def encode(self, text):
+        """Encode text using generated Huffman codes."""
+        return "".join(self.codes[char] for char in text) if self.codes else ""
+
+    @timed("decode", lambda self, encoded_text: len(encoded_text) // 8)
+    def decode(self, encoded_text, reverse_codes=None):
+        """Decode binary string using Huffman codes (this tree's, unless `reverse_codes` is given)."""
+        if reverse_codes is None:
+            reverse_codes = self.reverse_codes
+        decoded_text = []
+        current_code = ""
+        for bit in encoded_text:
+            current_code += bit
+            if current_code in reverse_codes:
+                decoded_text.append(reverse_codes[current_code])
+                current_code = ""
+        return "".join(decoded_text)
+
+    def compress(self, text, block_size=BLOCK_SIZE):
+        """Compress text into a seekable archive.
+
+        Layout: magic, 4-byte header length, JSON header, seek index,
+        packed code bits. The JSON header holds the codes and sizes; the seek
+        index is a fixed-width table with the bit position and character
+        offset of every `block_size`-th symbol, so a reader looks up just the
+        entries it needs instead of parsing the whole index.
+        """
+        self.build_tree(text)
+        index = []
+        bits = []
+        position = 0
+        for offset, char in enumerate(text):
+            if offset % block_size == 0:
+                index.append(INDEX_ENTRY.pack(position, offset))
+            code = self.codes[char]
+            bits.append(code)
+            position += len(code)
+        payload = pack_bits("".join(bits))
+        header = json.dumps({"block_size": block_size, "length": len(text), "bits": position,
+                             "codes": self.codes, "blocks": len(index)}).encode("utf-8")
+        return ARCHIVE_MAGIC + struct.pack(">I", len(header)) + header + b"".join(index) + payload
+
+    @staticmethod
+    def read_header(data):
+        """Parse an archive header, returning it and the payload offset.
+
+        The seek index itself is not read; its position is stored in the
+        header as "index_offset".
+        """
+        if data[:4] != ARCHIVE_MAGIC:
+            raise ValueError("Not a Huffman archive")
+        (size,) = struct.unpack(">I", data[4:8])
+        header = json.loads(bytes(data[8:8 + size]).decode("utf-8"))
+        header["index_offset"] = 8 + size
+        return header, 8 + size + header["blocks"] * INDEX_ENTRY.size
+
+    def decompress(self, data):
+        """Decode a whole archive produced by compress."""
+        header, offset = self.read_header(data)
+        return self.decode_slice(data, header, offset, 0, header["length"])
+
+    def decode_slice(self, data, header, offset, start, stop):
+        """Decode characters [start, stop) touching only the blocks that cover them."""
+        start = max(start, 0)
+        stop = min(stop, header["length"])
+        if start >= stop:
+            return ""
+        first = start // header["block_size"]
+        last = (stop - 1) // header["block_size"] + 1
+        bit_start, first_char = INDEX_ENTRY.unpack_from(data, header["index_offset"] + first * INDEX_ENTRY.size)
+        if last < header["blocks"]:
+            bit_stop, _ = INDEX_ENTRY.unpack_from(data, header["index_offset"] + last * INDEX_ENTRY.size)
+        else:
+            bit_stop = header["bits"]
+
+        chunk = data[offset + bit_start // 8:offset + (bit_stop + 7) // 8]
+        bits = unpack_bits(chunk)
+        shift = bit_start % 8
+        # The archive's codes, kept apart from this instance's own tree
+        reverse_codes = {code: char for char, code in header["codes"].items()}
+        decoded = self.decode(bits[shift:shift + bit_stop - bit_start], reverse_codes)
+        skip = start - first_char
+        return decoded[skip:skip + stop - start]
+
+    def decode_range(self, path, start, stop):
+        """Decode characters [start, stop) of an archive file through mmap."""
+        with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            header, offset = self.read_header(data)
+            return self.decode_slice(data, header, offset, start, stop)
+
+    @timed("visualize_tree")
+    def visualize_tree(self, show_frequencies=True):
+        """Generate visual representation of Huffman tree using Graphviz.
+
+        Without frequencies the image only depends on the tree's shape, so it
+        stays accurate while counts change but the codes do not.
+        """
+        if not self.huffman_tree:
+            return None
+
+        import graphviz  # Deferred: only tree rendering needs Graphviz
+        dot = graphviz.Digraph(comment="Huffman Tree")
+        
+        def add_node(node, parent_name=None):
+            """Recursively add nodes and edges to Graphviz graph."""
+            if node:
+                node_id = str(id(node))  # Unique identifier for node
+                # Label format: character/frequency for leaves, internal nodes show frequency
+                label = node.char if node.char else "Internal"
+                if show_frequencies:
+                    label += f"\n{node.freq}"
+                dot.node(node_id, label)
+                if parent_name is not None:
+                    dot.edge(parent_name, node_id)
+                add_node(node.left, node_id)
+                add_node(node.right, node_id)
+
+        add_node(self.huffman_tree)
+        return dot.pipe(format="png")  # Return PNG image data
+
+
+class HuffmanCodebook:
+    """Static Huffman codes trained once on a sample corpus and reused for many messages.
+
+    Messages are encoded without building a tree or storing one per message.
+    Characters the corpus never contained are written as the escape code
+    followed by their 21-bit code point.
+    """
+
+    _cache = {}  # Loaded codebooks keyed by ID
+    _files = {}  # Path to (mtime, size, codebook) for files already loaded
+
+    def __init__(self, codes):
+        self.codes = codes
+        self.reverse_codes = {code: char for char, code in codes.items()}
+        self.id = self.codebook_id(codes)
+
+    @staticmethod
+    def codebook_id(codes):
+        """Content hash identifying a set of codes."""
+        return hashlib.sha256(json.dumps(codes, sort_keys=True).encode("utf-8")).hexdigest()[:16]
+
+    @classmethod
+    def train(cls, samples):
+        """Build a codebook from an iterable of sample texts."""
+        frequency = defaultdict(int)
+        for text in samples:
+            for char in text:
+                frequency[char] += 1
+        frequency[ESCAPE] = 1
+        huffman = HuffmanCoding()
+        huffman.build_tree_from_frequencies(frequency)
+        return cls.register(cls(huffman.codes))
+
+    @classmethod
+    def register(cls, codebook):
+        """Return the cached codebook with the same ID, caching this one if new."""
+        return cls._cache.setdefault(codebook.id, codebook)
+
+    @classmethod
+    def get(cls, codebook_id):
+        """Return a cached codebook by ID, or None."""
+        return cls._cache.get(codebook_id)
+
+    @classmethod
+    def load(cls, path):
+        """Load a saved codebook, reusing the cached copy if already loaded.
+
+        A file is only read again once its modification time or size
+        changes. Codebooks are cached by the hash of the stored codes, never
+        by the stored "id", so an edited file cannot pick up a stale one.
+        """
+        path = os.path.abspath(path)
+        stat = os.stat(path)
+        key = (stat.st_mtime_ns, stat.st_size)
+        seen = cls._files.get(path)
+        if seen and seen[:2] == key:
+            return seen[2]
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        codebook_id = cls.codebook_id(data["codes"])
+        if data.get("id", codebook_id) != codebook_id:
+            raise ValueError(f"Codebook {path} is corrupt: its id does not match its codes")
+        codebook = cls.get(codebook_id) or cls.register(cls(data["codes"]))
+        cls._files[path] = key + (codebook,)
+        return codebook
+
+    def save(self, path):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({"id": self.id, "codes": self.codes}, f)
+
+    @timed("codebook_encode", lambda self, text: len(text.encode("utf-8")))
+    def encode(self, text):
+        """Encode text to a binary string with the fixed codes."""
+        codes = self.codes
+        escape = codes[ESCAPE]
+        return "".join(codes.get(char) or escape + format(ord(char), f"0{CODEPOINT_BITS}b")
+                       for char in text)
+
+    @timed("codebook_decode", lambda self, encoded_text: len(encoded_text) // 8)
+    def decode(self, encoded_text):
+        """Decode a binary string produced by encode."""
+        decoded_text = []
+        current_code = ""
+        i = 0
+        while i < len(encoded_text):
+            current_code += encoded_text[i]
+            i += 1
+            if current_code in self.reverse_codes:
+                char = self.reverse_codes[current_code]
+                if char == ESCAPE:
+                    char = chr(int(encoded_text[i:i + CODEPOINT_BITS], 2))
+                    i += CODEPOINT_BITS
+                decoded_text.append(char)
+                current_code = ""
+        return "".join(decoded_text)
+
+    def pack(self, text):
+        """Encode text as bytes: magic, codebook ID, 4-byte bit count, packed bits."""
+        bits = self.encode(text)
+        return CODEBOOK_MAGIC + self.id.encode("ascii") + struct.pack(">I", len(bits)) + pack_bits(bits)
+
+    def unpack(self, data):
+        """Decode bytes produced by pack with this codebook."""
+        if data[:4] != CODEBOOK_MAGIC:
+            raise ValueError("Not a codebook-encoded message")
+        if data[4:20].decode("ascii") != self.id:
+            raise ValueError("Message was encoded with a different codebook")
+        (size,) = struct.unpack(">I", data[20:24])
+        return self.decode(unpack_bits(data[24:])[:size])
+
+
+def common_prefix(a, b):
+    """Length of the common prefix of two strings, using C-level slice compares."""
+    lo, hi = 0, min(len(a), len(b))
+    while lo < hi:
+        mid = (lo + hi + 1) // 2
+        if a[:mid] == b[:mid]:
+            lo = mid
+        else:
+            hi = mid - 1
+    return lo
+
+
+def common_suffix(a, b, limit):
+    """Length of the common suffix of two strings, at most `limit`."""
+    lo, hi = 0, min(len(a), len(b), limit)
+    while lo < hi:
+        mid = (lo + hi + 1) // 2
+        if a[len(a) - mid:] == b[len(b) - mid:]:
+            lo = mid
+        else:
+            hi = mid - 1
+    return lo
+
+
+class IncrementalHuffman:
+    """Keeps a text's frequencies, codes and encoding in step with small edits.
+
+    Each update only counts the edited characters. The codes are rebuilt
+    only when the frequencies changed, and the text is fully re-encoded
+    only when the rebuilt codes differ. Otherwise just the blocks covering
+    the edit are re-encoded.
+    """
+
+    def __init__(self, block_size=LIVE_BLOCK_SIZE):
+        self.block_size = block_size
+        self.huffman = HuffmanCoding()
+        self.text = ""
+        self.frequency = Counter()
+        self.blocks = []  # [text piece, encoded bits] in text order
+
+    @property
+    def encoded(self):
+        return "".join(bits for _, bits in self.blocks)
+
+    def update(self, text):
+        """Apply the edit from the previous text to `text`; returns True if the codes changed."""
+        old = self.text
+        start = common_prefix(old, text)
+        tail = common_suffix(old, text, min(len(old), len(text)) - start)
+        old_end, new_end = len(old) - tail, len(text) - tail
+        removed, added = Counter(old[start:old_end]), Counter(text[start:new_end])
+        self.text = text
+        if old_end == start and new_end == start:
+            return False  # Nothing changed
+
+        codes_changed = False
+        if removed != added:
+            with PROFILER.phase("frequency_delta", new_end - start):
+                self.frequency.subtract(removed)
+                self.frequency.update(added)
+                self.frequency = +self.frequency  # Drop symbols no longer present
+            previous = self.huffman.codes
+            self.huffman.build_tree_from_frequencies(self.frequency)
+            codes_changed = self.huffman.codes != previous
+
+        if codes_changed or not self.blocks:
+            self.blocks = self._encode_blocks(text)
+        else:
+            self._reencode(start, old_end, new_end)
+        return codes_changed
+
+    def _encode_blocks(self, text):
+        codes = self.huffman.codes
+        with PROFILER.phase("live_encode", len(text)):
+            pieces = [text[i:i + self.block_size] for i in range(0, len(text), self.block_size)]
+            return [[piece, "".join(codes[char] for char in piece)] for piece in pieces]
+
+    def _reencode(self, start, old_end, new_end):
+        """Re-encode only the blocks overlapping old text [start, old_end)."""
+        offset, first = 0, None
+        for i, (piece, _) in enumerate(self.blocks):
+            end = offset + len(piece)
+            if first is None and (start < end or i == len(self.blocks) - 1):
+                first, first_offset = i, offset
+            if first is not None and (old_end <= end or i == len(self.blocks) - 1):
+                last, last_end = i, end
+                break
+            offset = end
+        region = self.text[first_offset:last_end + new_end - old_end]
+        self.blocks[first:last + 1] = self._encode_blocks(region)
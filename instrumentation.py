@@ -0,0 +1,144 @@
+"""Lightweight per-phase timing for the Huffman and RLE codecs.
+
+Codec code marks its phases with ``PROFILER.phase(name, nbytes)`` or the
+``timed`` decorator. While the profiler is disabled both cost a single
+attribute check; once enabled they record wall time, bytes processed,
+throughput and (optionally) the allocation peak of every phase.
+"""
+import json
+import time
+import tracemalloc
+from contextlib import contextmanager, nullcontext
+from functools import wraps
+
+_NULL = nullcontext()
+
+
+class Profiler:
+    """Collects phase records while enabled."""
+
+    def __init__(self):
+        self.enabled = False
+        self.track_memory = False
+        self.records = []
+        self.cprofile = None
+        self.use_cprofile = False  # Whether the last enable() asked for cProfile
+        self._owns_tracemalloc = False  # Whether this profiler started tracemalloc
+        self._stack = []  # [start allocation, peak above it] for each open phase
+
+    def enable(self, track_memory=False, cprofile=False):
+        """Start recording; memory tracking and cProfile add noticeable overhead."""
+        self.enabled = True
+        self.track_memory = track_memory
+        if track_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._owns_tracemalloc = True
+        elif not track_memory:
+            self._stop_tracemalloc()
+        self.use_cprofile = cprofile
+        if self.cprofile:
+            self.cprofile.disable()
+        if cprofile:
+            import cProfile  # Deferred: only needed when profiling is requested
+            self.cprofile = cProfile.Profile()
+            self.cprofile.enable()
+
+    def disable(self):
+        self.enabled = False
+        if self.cprofile:
+            self.cprofile.disable()  # Stats stay available to export_cprofile
+        self._stop_tracemalloc()
+        self.track_memory = False
+
+    def _stop_tracemalloc(self):
+        """Stop tracemalloc only if this profiler started it."""
+        if self._owns_tracemalloc and tracemalloc.is_tracing():
+            tracemalloc.stop()
+        self._owns_tracemalloc = False
+
+    def clear(self):
+        self.records = []
+        if self.cprofile:
+            # Only one profiler may be active at a time (enforced on 3.12+)
+            self.cprofile.disable()
+            self.cprofile = None
+        if self.use_cprofile:
+            import cProfile
+            self.cprofile = cProfile.Profile()
+            if self.enabled:
+                self.cprofile.enable()
+
+    def phase(self, name, nbytes=0):
+        """Context manager timing one phase; a shared no-op while disabled."""
+        if not self.enabled:
+            return _NULL
+        return self._record(name, nbytes)
+
+    @contextmanager
+    def _record(self, name, nbytes):
+        if self.track_memory:
+            current, peak = tracemalloc.get_traced_memory()
+            # Keep the peak seen so far by enclosing phases before resetting it
+            for frame in self._stack:
+                frame[1] = max(frame[1], peak - frame[0])
+            tracemalloc.reset_peak()
+            self._stack.append([current, 0])
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            seconds = time.perf_counter() - start
+            record = {"phase": name, "seconds": seconds, "bytes": nbytes,
+                      "mb_per_s": nbytes / seconds / 1e6 if seconds and nbytes else 0.0}
+            if self.track_memory:
+                _, peak = tracemalloc.get_traced_memory()
+                frame = self._stack.pop()
+                record["peak_bytes"] = max(frame[1], peak - frame[0])
+                for outer in self._stack:
+                    outer[1] = max(outer[1], peak - outer[0])
+            self.records.append(record)
+
+    def summary(self):
+        """One line per recorded phase, in completion order."""
+        lines = []
+        for r in self.records:
+            line = f"{r['phase']}: {r['seconds'] * 1000:.2f} ms"
+            if r["bytes"]:
+                line += f", {r['bytes']} B, {r['mb_per_s']:.2f} MB/s"
+            if "peak_bytes" in r:
+                line += f", peak {r['peak_bytes'] / 1024:.1f} KiB"
+            lines.append(line)
+        return "\n".join(lines)
+
+    def export_json(self, path):
+        with open(path, "w") as f:
+            json.dump(self.records, f, indent=2)
+
+    def export_cprofile(self, path):
+        """Write cProfile stats (readable with pstats/snakeviz); needs enable(cprofile=True)."""
+        if not self.cprofile:
+            raise RuntimeError("cProfile was not enabled")
+        self.cprofile.dump_stats(path)
+
+    def export(self, path):
+        """Export as a cProfile dump for '.prof' paths, JSON records otherwise."""
+        if path.lower().endswith(".prof"):
+            self.export_cprofile(path)
+        else:
+            self.export_json(path)
+
+
+PROFILER = Profiler()
+
+
+def timed(name, size=None):
+    """Decorator recording a call as phase `name`; `size(*args)` gives the bytes processed."""
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            if not PROFILER.enabled:
+                return func(*args, **kwargs)
+            with PROFILER.phase(name, size(*args) if size else 0):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
@@ -0,0 +1,202 @@
+"""Load-test harness for the library storage backends.
+
+Builds a synthetic catalog, member list and circulation history, then
+drives insert/search/issue/return from several worker threads and reports
+latency percentiles and throughput per operation.
+
+    python library_loadtest.py --backend sqlite --books 20000 --ops 5000
+"""
+import argparse
+import os
+import random
+import tempfile
+import threading
+import time
+from collections import Counter, defaultdict
+from datetime import date, timedelta
+
+from library_storage import CirculationError, open_storage
+
+OPERATIONS = ('insert', 'search', 'issue', 'return')
+TABLES = ('rec', 'member', 'bookstat', 'bookrec')
+
+
+def is_empty(db):
+    return all(not db.fetchall("SELECT 1 FROM {} LIMIT 1".format(table)) for table in TABLES)
+
+
+def clear(db):
+    """Delete every row populate() may have written, in one transaction."""
+    try:
+        db.begin()
+        for table in TABLES:
+            db.execute("DELETE FROM {}".format(table), commit=False)
+        db.cobj.commit()
+    except Exception:
+        db.cobj.rollback()
+        raise
+
+
+def populate(db, books, members, history, seed=0):
+    """Fill an empty database with a synthetic catalog, members and history.
+
+    bookrec has no key, so filling a database twice would duplicate books.
+    """
+    rnd = random.Random(seed)
+    authors = ['Author {}'.format(i) for i in range(max(1, books // 20))]
+    start = date(2015, 1, 1)
+    # Past circulation is closed; only its lost copies are missing from the shelf.
+    past = [(rnd.randint(1, books), rnd.randint(1, members), start + timedelta(days=rnd.randint(0, 3000)),
+             'Lost' if rnd.random() < 0.02 else 'Returned') for _ in range(history)]
+    lost = Counter(bno for bno, _, _, stat in past if stat == 'Lost')
+    # qty is the copies purchased here; sync_stats takes the lost ones off it.
+    db.executemany("INSERT INTO bookrec VALUES (%s, %s, %s, %s, %s)",
+                   [(bno, 'Book {}'.format(bno), rnd.choice(authors), rnd.randint(100, 1000),
+                     rnd.randint(1, 10) + lost[bno]) for bno in range(1, books + 1)])
+    db.executemany("INSERT INTO member VALUES (%s, %s, %s, %s)",
+                   [(mno, 'Member {}'.format(mno), start + timedelta(days=rnd.randint(0, 3000)),
+                     'member{}@example.com'.format(mno)) for mno in range(1, members + 1)])
+    db.executemany("INSERT INTO rec VALUES (%s, %s, %s, %s)", past)
+    db.sync_stats()
+    return authors
+
+
+class LoadTest:
+    """Runs a random mix of operations against one backend and times each call."""
+
+    def __init__(self, backend, books, members, workers, **options):
+        self.backend = backend
+        self.options = options
+        self.books = books
+        self.members = members
+        self.workers = workers
+        self.next_bno = books + 1
+        self.lock = threading.Lock()
+        self.latencies = defaultdict(list)
+        self.failures = defaultdict(int)
+        self.errors = defaultdict(int)
+
+    def worker(self, ops, seed):
+        rnd = random.Random(seed)
+        loans = []  # (bno, mno) issued by this worker and not yet returned
+        latencies = defaultdict(list)
+        failures = defaultdict(int)
+        errors = defaultdict(int)
+        db = None
+        try:
+            db = open_storage(self.backend, **self.options)
+            for _ in range(ops):
+                op = rnd.choice(OPERATIONS)
+                if op == 'return' and not loans:
+                    op = 'issue'
+                started = time.perf_counter()
+                try:
+                    if op == 'insert':
+                        with self.lock:
+                            bno = self.next_bno
+                            self.next_bno += 1
+                        db.insert_book(bno, 'Book {}'.format(bno), 'Author 0', 500, 3)
+                    elif op == 'search':
+                        db.search_by_name('Book {}'.format(rnd.randint(1, self.books)))
+                    elif op == 'issue':
+                        bno, mno = rnd.randint(1, self.books), rnd.randint(1, self.members)
+                        db.issue_book(bno, mno, date.today())
+                        loans.append((bno, mno))
+                    else:
+                        bno, mno = loans.pop(rnd.randrange(len(loans)))
+                        db.return_book(bno, mno, 'Returned')
+                except CirculationError:
+                    failures[op] += 1  # out of stock: still a completed request
+                except Exception:
+                    errors[op] += 1  # lock timeout, deadlock, lost connection...
+                    continue
+                latencies[op].append(time.perf_counter() - started)
+        except Exception:
+            errors['connect'] += 1
+        finally:
+            if db is not None:
+                db.close()
+            with self.lock:
+                for op, values in latencies.items():
+                    self.latencies[op].extend(values)
+                for op, count in failures.items():
+                    self.failures[op] += count
+                for op, count in errors.items():
+                    self.errors[op] += count
+
+    def run(self, ops, seed=0):
+        per_worker = ops // self.workers
+        threads = [threading.Thread(target=self.worker, args=(per_worker, seed + i))
+                   for i in range(self.workers)]
+        started = time.perf_counter()
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        return time.perf_counter() - started
+
+
+def percentile(values, pct):
+    """Nearest-rank percentile of an already sorted list."""
+    if not values:
+        return 0.0
+    return values[min(len(values) - 1, max(0, int(round(pct / 100 * len(values))) - 1))]
+
+
+def report(test, elapsed):
+    """Print latency and throughput per operation; errored calls are counted but not timed."""
+    print('{:<8}{:>8}{:>8}{:>8}{:>10}{:>10}{:>10}{:>10}{:>12}'.format(
+        'op', 'count', 'failed', 'errors', 'p50 ms', 'p95 ms', 'p99 ms', 'max ms', 'ops/s'))
+    total = 0
+    for op in OPERATIONS:
+        values = sorted(test.latencies.get(op, []))
+        total += len(values)
+        print('{:<8}{:>8}{:>8}{:>8}{:>10.2f}{:>10.2f}{:>10.2f}{:>10.2f}{:>12.1f}'.format(
+            op, len(values), test.failures.get(op, 0), test.errors.get(op, 0),
+            percentile(values, 50) * 1000, percentile(values, 95) * 1000,
+            percentile(values, 99) * 1000, (values[-1] if values else 0) * 1000,
+            len(values) / elapsed if elapsed else 0))
+    print('total   {:>8} ops in {:.2f}s ({:.1f} ops/s)'.format(total, elapsed, total / elapsed if elapsed else 0))
+    if test.errors:
+        print('errors  {:>8} ({})'.format(sum(test.errors.values()),
+                                          ', '.join('{} {}'.format(op, n) for op, n in sorted(test.errors.items()))))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Library storage load test")
+    parser.add_argument('--backend', choices=['mysql', 'sqlite'], default='sqlite')
+    parser.add_argument('--sqlite-path', help="SQLite file (default: a temporary file)")
+    parser.add_argument('--database', default='libt_load', help="MySQL database to fill (default: libt_load)")
+    parser.add_argument('--books', type=int, default=10000)
+    parser.add_argument('--members', type=int, default=2000)
+    parser.add_argument('--history', type=int, default=50000)
+    parser.add_argument('--ops', type=int, default=4000)
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--reset', action='store_true', help="Empty a database left by an earlier run first")
+    args = parser.parse_args()
+
+    if args.backend == 'sqlite':
+        path = args.sqlite_path or os.path.join(tempfile.mkdtemp(), 'libt_load.db')
+        options = {'path': path}
+    else:
+        options = {'database': args.database}
+
+    db = open_storage(args.backend, **options)
+    if not is_empty(db):
+        if not args.reset:
+            db.close()
+            parser.error("the database already has data; pass --reset to empty it first")
+        clear(db)
+    started = time.perf_counter()
+    populate(db, args.books, args.members, args.history, args.seed)
+    db.close()
+    print('Populated {} books, {} members, {} history rows in {:.2f}s'.format(
+        args.books, args.members, args.history, time.perf_counter() - started))
+
+    test = LoadTest(args.backend, args.books, args.members, args.workers, **options)
+    report(test, test.run(args.ops, args.seed))
+
+
+if __name__ == "__main__":
+    main()
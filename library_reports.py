@@ -0,0 +1,73 @@
+"""Circulation reports for the library dashboard.
+
+Every report reads the bookstat counters or an indexed range of rec, so
+the cost depends on the size of the answer rather than on how much
+circulation history has built up.
+
+    python library_reports.py --backend sqlite availability 12
+    python library_reports.py overdue --days 14
+"""
+import argparse
+from datetime import date, timedelta
+
+from library_storage import open_storage
+
+LOAN_DAYS = 14
+
+
+def availability(db, bno):
+    """Copies of `bno` on the shelf, out, lost and issued in total."""
+    row = db.availability(bno)
+    if row is None:
+        return None
+    return dict(zip(('available', 'issued', 'lost', 'issues'), row))
+
+
+def overdue(db, loan_days=LOAN_DAYS, today=None):
+    """Open issues older than the loan period."""
+    cutoff = (today or date.today()) - timedelta(days=loan_days)
+    return db.overdue(cutoff)
+
+
+def lost(db):
+    """Members holding lost books, as (mno, bno, dos) rows."""
+    return db.lost_holders()
+
+
+def popular(db, limit=10):
+    """Most issued titles as (bno, bname, issues) rows."""
+    return db.popular(limit)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Library circulation reports")
+    parser.add_argument('--backend', choices=['mysql', 'sqlite'], default='mysql')
+    parser.add_argument('--sqlite-path', default='libt.db')
+    sub = parser.add_subparsers(dest='report', required=True)
+    sub.add_parser('availability').add_argument('bno', type=int)
+    sub.add_parser('overdue').add_argument('--days', type=int, default=LOAN_DAYS)
+    sub.add_parser('lost')
+    sub.add_parser('popular').add_argument('--limit', type=int, default=10)
+    args = parser.parse_args()
+
+    options = {'path': args.sqlite_path} if args.backend == 'sqlite' else {}
+    db = open_storage(args.backend, **options)
+    if args.report == 'availability':
+        result = availability(db, args.bno)
+        print(result if result else 'NO RECORDS FOUND')
+    else:
+        if args.report == 'overdue':
+            data = overdue(db, args.days)
+        elif args.report == 'lost':
+            data = lost(db)
+        else:
+            data = popular(db, args.limit)
+        if len(data) == 0:
+            print('NO RECORDS FOUND')
+        for i in data:
+            print(i)
+    db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+"""Concurrent circulation service for the library database.
+
+Many desks can connect at once and send one JSON request per line:
+
+    {"op": "issue", "bno": 12, "mno": 3, "dos": "2024-05-01"}
+    {"op": "return", "bno": 12, "mno": 3, "stat": "Returned"}
+    {"op": "issue_batch", "bnos": [12, 40, 41], "mno": 3}
+    {"op": "return_batch", "bnos": [12, 40, 41], "mno": 3, "stat": "Returned"}
+
+Every request runs as its own short transaction on a worker thread's
+connection. Stock is changed with conditional UPDATEs
+(``qty=qty-1 ... AND qty>0``) so copies are never over-issued and no
+update is lost. Batch requests cover all their books in one transaction
+and reply with a result per book.
+"""
+import asyncio
+import json
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
+
+from library_storage import CirculationError, open_storage
+
+WORKERS = 16
+DEADLOCK_RETRIES = 3
+ER_LOCK_DEADLOCK = 1213
+# Request op -> (storage method, field holding the book number(s))
+OPERATIONS = {
+    'issue': ('issue_book', 'bno'),
+    'return': ('return_book', 'bno'),
+    'issue_batch': ('issue_books', 'bnos'),
+    'return_batch': ('return_books', 'bnos'),
+}
+
+
+class CirculationService:
+    """asyncio front end that runs blocking transactions on a worker pool."""
+
+    def __init__(self, backend='mysql', workers=WORKERS, **storage_options):
+        self.backend = backend
+        self.storage_options = storage_options
+        self.executor = ThreadPoolExecutor(max_workers=workers)
+        self.local = threading.local()
+
+    def storage(self):
+        """Return the calling worker thread's own storage connection."""
+        if not hasattr(self.local, 'storage'):
+            self.local.storage = open_storage(self.backend, **self.storage_options)
+        return self.local.storage
+
+    def _run(self, method, *args):
+        """Run one transaction, retrying if InnoDB picked it as a deadlock victim."""
+        for attempt in range(DEADLOCK_RETRIES):
+            try:
+                return getattr(self.storage(), method)(*args)
+            except CirculationError:
+                raise
+            except Exception as e:
+                if getattr(e, 'errno', None) != ER_LOCK_DEADLOCK or attempt == DEADLOCK_RETRIES - 1:
+                    raise
+
+    def handle(self, request):
+        """Translate one decoded request into a storage call.
+
+        Malformed requests raise CirculationError, so they are never
+        reported to the desk as database errors.
+        """
+        if not isinstance(request, dict):
+            raise CirculationError("Request must be a JSON object")
+        op = request.get('op')
+        if not isinstance(op, str) or op not in OPERATIONS:
+            raise CirculationError("Unknown operation {!r}".format(op))
+        method, books = OPERATIONS[op]
+        missing = [name for name in ('mno', books) if request.get(name) is None]
+        if missing:
+            raise CirculationError("Missing field {}".format(', '.join(missing)))
+        try:
+            mno = int(request['mno'])
+            dos = date.fromisoformat(request['dos']) if request.get('dos') is not None else date.today()
+            stat = request.get('stat', 'Returned')
+            if books == 'bnos':
+                bnos = [int(bno) for bno in request['bnos']]
+                return (method, mno, bnos, dos) if op == 'issue_batch' else (method, mno, bnos, stat)
+            bno = int(request['bno'])
+        except (TypeError, ValueError) as e:
+            raise CirculationError("Invalid request: {}".format(e))
+        return (method, bno, mno, dos) if op == 'issue' else (method, bno, mno, stat)
+
+    async def serve_client(self, reader, writer):
+        """Answer requests from one desk until it disconnects."""
+        loop = asyncio.get_running_loop()
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                try:
+                    call = self.handle(json.loads(line))
+                    results = await loop.run_in_executor(self.executor, self._run, *call)
+                    reply = {'ok': True}
+                    if results is not None:
+                        reply['results'] = results
+                except (CirculationError, ValueError) as e:
+                    reply = {'ok': False, 'error': str(e)}
+                except Exception as e:
+                    reply = {'ok': False, 'error': 'Database error: {}'.format(e)}
+                writer.write((json.dumps(reply) + '\n').encode())
+                await writer.drain()
+        finally:
+            writer.close()
+
+    async def serve(self, host='127.0.0.1', port=8765):
+        server = await asyncio.start_server(self.serve_client, host, port)
+        async with server:
+            await server.serve_forever()
+
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="Library circulation service")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--workers', type=int, default=WORKERS)
+    parser.add_argument('--backend', choices=['mysql', 'sqlite'], default='mysql')
+    parser.add_argument('--sqlite-path', default='libt.db')
+    args = parser.parse_args()
+    options = {'path': args.sqlite_path} if args.backend == 'sqlite' else {}
+    print('CIRCULATION SERVICE LISTENING ON {}:{}'.format(args.host, args.port))
+    service = CirculationService(args.backend, args.workers, **options)
+    asyncio.run(service.serve(args.host, args.port))
@@ -0,0 +1,378 @@
+"""Storage backends for the library manager.
+
+`Storage` holds the SQL shared by every backend; `MySQLStorage` and
+`SQLiteStorage` only supply the connection, the parameter placeholder and
+the few statements whose dialects differ. One Storage object wraps one
+connection, so threads should each open their own.
+"""
+import sqlite3
+from datetime import date
+
+sqlite3.register_adapter(date, date.isoformat)
+
+
+class CirculationError(Exception):
+    """Raised when an issue/return request cannot be applied."""
+
+
+class Storage:
+    """Base class for library storage backends."""
+
+    param = '%s'
+    # Appended to the SELECTs that validate a batch, to lock the rows they read.
+    LOCK = ''
+    # Close exactly one open issue of a book held by a member.
+    RETURN_SQL = None
+    SCHEMA = (
+        'CREATE TABLE IF NOT EXISTS bookrec (bno int(10), bname varchar(100), auth varchar(100), price int(10), qty int(10))',
+        'CREATE TABLE IF NOT EXISTS member (mno int(5), mname varchar(50), dom date, cont varchar(50))',
+        'CREATE TABLE IF NOT EXISTS rec (bno int(5), mno varchar(50), dos date, stat varchar(20))',
+        # Per-book circulation counters, kept in step with rec by issue_book/return_book.
+        # Copies on the shelf are bookrec.qty; issued/lost are copies currently out or
+        # lost, issues counts every issue ever made (for popularity).
+        'CREATE TABLE IF NOT EXISTS bookstat (bno int(10) PRIMARY KEY, issued int(10), lost int(10), issues int(10))',
+    )
+    INDEXES = (
+        ('bookrec_bno', 'bookrec', 'bno'),
+        ('bookrec_bname', 'bookrec', 'bname'),
+        ('bookrec_auth', 'bookrec', 'auth'),
+        ('member_mno', 'member', 'mno'),
+        ('rec_loan', 'rec', 'bno, mno, stat'),
+        ('rec_stat', 'rec', 'stat, dos'),
+        ('bookstat_issues', 'bookstat', 'issues'),
+    )
+
+    def __init__(self, cobj):
+        self.cobj = cobj
+
+    def sql(self, query):
+        """Translate a '%s'-style query to this backend's placeholder."""
+        return query if self.param == '%s' else query.replace('%s', self.param)
+
+    def execute(self, query, args=(), commit=True):
+        cur = self.cobj.cursor()
+        try:
+            cur.execute(self.sql(query), args)
+            if commit:
+                self.cobj.commit()
+            return cur.rowcount
+        finally:
+            cur.close()
+
+    def executemany(self, query, rows):
+        cur = self.cobj.cursor()
+        try:
+            cur.executemany(self.sql(query), rows)
+            self.cobj.commit()
+        finally:
+            cur.close()
+
+    def begin(self):
+        """Start a transaction explicitly; drivers that start one implicitly need nothing."""
+
+    def fetchall(self, query, args=()):
+        cur = self.cobj.cursor()
+        try:
+            cur.execute(self.sql(query), args)
+            return cur.fetchall()
+        finally:
+            cur.close()
+
+    def create_index(self, name, table, columns):
+        self.execute("CREATE INDEX IF NOT EXISTS {} ON {} ({})".format(name, table, columns))
+
+    def create_schema(self):
+        for query in self.SCHEMA:
+            self.execute(query)
+        for index in self.INDEXES:
+            self.create_index(*index)
+        self.sync_stats()
+
+    def sync_stats(self):
+        """Add counters for books that have none yet, rebuilt from rec.
+
+        Such books come from before bookstat existed, when bookrec.qty was
+        the copies purchased; their issued and lost copies are taken off qty
+        in the same transaction so it becomes the copies on the shelf.
+        """
+        try:
+            self.begin()
+            self.execute("UPDATE bookrec SET qty=qty-(SELECT COUNT(*) FROM rec r WHERE r.bno=bookrec.bno "
+                         "AND r.stat IN ('Reading', 'Lost')) "
+                         "WHERE NOT EXISTS (SELECT 1 FROM bookstat s WHERE s.bno=bookrec.bno)", commit=False)
+            self.execute("INSERT INTO bookstat (bno, issued, lost, issues) "
+                         "SELECT b.bno, "
+                         "(SELECT COUNT(*) FROM rec r WHERE r.bno=b.bno AND r.stat='Reading'), "
+                         "(SELECT COUNT(*) FROM rec r WHERE r.bno=b.bno AND r.stat='Lost'), "
+                         "(SELECT COUNT(*) FROM rec r WHERE r.bno=b.bno) "
+                         "FROM (SELECT DISTINCT bno FROM bookrec) b "
+                         "WHERE NOT EXISTS (SELECT 1 FROM bookstat s WHERE s.bno=b.bno)", commit=False)
+            self.cobj.commit()
+        except Exception:
+            self.cobj.rollback()
+            raise
+
+    def close(self):
+        self.cobj.close()
+
+    # Books
+    def insert_book(self, bno, bname, auth, price, qty):
+        try:
+            self.execute("INSERT INTO bookrec VALUES (%s, %s, %s, %s, %s)", (bno, bname, auth, price, qty), commit=False)
+            self.execute("INSERT INTO bookstat SELECT %s, 0, 0, 0 FROM bookrec WHERE bno=%s "
+                         "AND NOT EXISTS (SELECT 1 FROM bookstat WHERE bno=%s) LIMIT 1",
+                         (bno, bno, bno), commit=False)
+            self.cobj.commit()
+        except Exception:
+            self.cobj.rollback()
+            raise
+
+    def delete_book(self, bno):
+        try:
+            deleted = self.execute("DELETE FROM bookrec WHERE bno=%s", (bno,), commit=False)
+            self.execute("DELETE FROM bookstat WHERE bno=%s", (bno,), commit=False)
+            self.cobj.commit()
+        except Exception:
+            self.cobj.rollback()
+            raise
+        return deleted
+
+    def update_book(self, bno, bname, auth, price, qty):
+        """Update a book; `qty` is the total copies held, issued ones included.
+
+        bookrec.qty stores copies on the shelf, so it is set to `qty` less
+        the copies currently issued, in the same transaction.
+        """
+        try:
+            self.begin()
+            # Lock bookrec before bookstat, in the same order as issue_book
+            if not self.fetchall("SELECT qty FROM bookrec WHERE bno=%s" + self.LOCK, (bno,)):
+                self.cobj.rollback()
+                return 0
+            rows = self.fetchall("SELECT issued FROM bookstat WHERE bno=%s" + self.LOCK, (bno,))
+            issued = rows[0][0] if rows else 0
+            if qty < issued:
+                raise CirculationError("Book {} has {} copies issued; total cannot be {}".format(bno, issued, qty))
+            updated = self.execute("UPDATE bookrec SET bname=%s, auth=%s, price=%s, qty=%s WHERE bno=%s",
+                                   (bname, auth, price, qty - issued, bno), commit=False)
+            self.cobj.commit()
+        except Exception:
+            self.cobj.rollback()
+            raise
+        return updated
+
+    def search_by_name(self, bname):
+        return self.fetchall("SELECT * FROM bookrec WHERE bname=%s", (bname,))
+
+    def search_by_author(self, auth):
+        return self.fetchall("SELECT * FROM bookrec WHERE auth=%s", (auth,))
+
+    # Members
+    def insert_member(self, mno, mname, dom, cont):
+        self.execute("INSERT INTO member VALUES (%s, %s, %s, %s)", (mno, mname, dom, cont))
+
+    def delete_member(self, mno):
+        return self.execute("DELETE FROM member WHERE mno=%s", (mno,))
+
+    def update_member(self, mno, mname, dom, cont):
+        return self.execute("UPDATE member SET mname=%s, dom=%s, cont=%s WHERE mno=%s",
+                            (mname, dom, cont, mno))
+
+    def search_member(self, mno):
+        return self.fetchall("SELECT * FROM member WHERE mno=%s", (mno,))
+
+    # Circulation
+    def issue_book(self, bno, mno, dos):
+        """Issue one copy of book `bno` to member `mno` in a single transaction."""
+        try:
+            if self.execute("UPDATE bookrec SET qty=qty-1 WHERE bno=%s AND qty>0", (bno,), commit=False) == 0:
+                raise CirculationError("Book {} not available".format(bno))
+            self.execute("INSERT INTO rec VALUES (%s, %s, %s, 'Reading')", (bno, mno, dos), commit=False)
+            self.execute("UPDATE bookstat SET issued=issued+1, issues=issues+1 WHERE bno=%s", (bno,), commit=False)
+            self.cobj.commit()
+        except Exception:
+            self.cobj.rollback()
+            raise
+
+    def return_book(self, bno, mno, stat='Returned'):
+        """Close the open issue of `bno` held by `mno` as Returned or Lost."""
+        if stat not in ('Returned', 'Lost'):
+            raise CirculationError("Invalid status {!r}".format(stat))
+        try:
+            if self.execute(self.RETURN_SQL, (stat, bno, mno), commit=False) == 0:
+                raise CirculationError("Book {} is not issued to member {}".format(bno, mno))
+            if stat == 'Returned':
+                self.execute("UPDATE bookrec SET qty=qty+1 WHERE bno=%s", (bno,), commit=False)
+                self.execute("UPDATE bookstat SET issued=issued-1 WHERE bno=%s", (bno,), commit=False)
+            else:
+                self.execute("UPDATE bookstat SET issued=issued-1, lost=lost+1 WHERE bno=%s", (bno,), commit=False)
+            self.cobj.commit()
+        except Exception:
+            self.cobj.rollback()
+            raise
+
+    def issue_books(self, mno, bnos, dos):
+        """Issue several books to member `mno` in one transaction.
+
+        Every book is validated before anything is written; the books that
+        pass are then issued with multi-row statements and a single commit.
+        Returns one {'bno', 'ok', 'error'} result per requested book.
+        """
+        valid = list(dict.fromkeys(bnos))
+        errors = {}
+        if not valid:
+            return []
+        try:
+            self.begin()
+            marks = placeholders(len(valid))
+            stock = dict(self.fetchall("SELECT bno, qty FROM bookrec WHERE bno IN ({})".format(marks) + self.LOCK,
+                                       valid))
+            for bno in valid:
+                if bno not in stock:
+                    errors[bno] = "Book {} does not exist".format(bno)
+                elif stock[bno] <= 0:
+                    errors[bno] = "Book {} not available".format(bno)
+            valid = [bno for bno in valid if bno not in errors]
+            if valid:
+                marks = placeholders(len(valid))
+                self.execute("UPDATE bookrec SET qty=qty-1 WHERE bno IN ({})".format(marks), valid, commit=False)
+                self.execute("INSERT INTO rec VALUES " + ', '.join(["(%s, %s, %s, 'Reading')"] * len(valid)),
+                             [arg for bno in valid for arg in (bno, mno, dos)], commit=False)
+                self.execute("UPDATE bookstat SET issued=issued+1, issues=issues+1 WHERE bno IN ({})".format(marks),
+                             valid, commit=False)
+            self.cobj.commit()
+        except Exception:
+            self.cobj.rollback()
+            raise
+        return self._batch_results(bnos, errors)
+
+    def return_books(self, mno, bnos, stat='Returned'):
+        """Close the open issues of several books held by `mno` in one transaction.
+
+        Works like issue_books: validate all, apply the rest together, and
+        return one result per requested book.
+        """
+        if stat not in ('Returned', 'Lost'):
+            raise CirculationError("Invalid status {!r}".format(stat))
+        valid = list(dict.fromkeys(bnos))
+        errors = {}
+        if not valid:
+            return []
+        try:
+            self.begin()
+            marks = placeholders(len(valid))
+            held = dict(self.fetchall("SELECT bno, COUNT(*) FROM rec WHERE mno=%s AND stat='Reading' "
+                                      "AND bno IN ({}) GROUP BY bno".format(marks) + self.LOCK, [mno] + valid))
+            for bno in valid:
+                if bno not in held:
+                    errors[bno] = "Book {} is not issued to member {}".format(bno, mno)
+            valid = [bno for bno in valid if bno not in errors]
+            # A member holding several copies of a title returns only one of them.
+            single = [bno for bno in valid if held[bno] == 1]
+            if single:
+                self.execute("UPDATE rec SET stat=%s WHERE mno=%s AND stat='Reading' AND bno IN ({})".format(
+                    placeholders(len(single))), [stat, mno] + single, commit=False)
+            for bno in valid:
+                if held[bno] > 1:
+                    self.execute(self.RETURN_SQL, (stat, bno, mno), commit=False)
+            if valid:
+                marks = placeholders(len(valid))
+                if stat == 'Returned':
+                    self.execute("UPDATE bookrec SET qty=qty+1 WHERE bno IN ({})".format(marks), valid, commit=False)
+                    self.execute("UPDATE bookstat SET issued=issued-1 WHERE bno IN ({})".format(marks),
+                                 valid, commit=False)
+                else:
+                    self.execute("UPDATE bookstat SET issued=issued-1, lost=lost+1 WHERE bno IN ({})".format(marks),
+                                 valid, commit=False)
+            self.cobj.commit()
+        except Exception:
+            self.cobj.rollback()
+            raise
+        return self._batch_results(bnos, errors)
+
+    @staticmethod
+    def _batch_results(bnos, errors):
+        """One result per requested book; only the first request for a book is processed."""
+        results, seen = [], set()
+        for bno in bnos:
+            if bno in seen:
+                results.append({'bno': bno, 'ok': False, 'error': "Book {} repeated in batch".format(bno)})
+            elif bno in errors:
+                results.append({'bno': bno, 'ok': False, 'error': errors[bno]})
+            else:
+                results.append({'bno': bno, 'ok': True})
+            seen.add(bno)
+        return results
+
+    def search_issued(self, stat):
+        return self.fetchall("SELECT * FROM rec WHERE stat=%s", (stat,))
+
+    # Reports, answered from bookstat and the rec indexes
+    def availability(self, bno):
+        """Return (available, issued, lost, issues) for one book, or None."""
+        rows = self.fetchall("SELECT b.qty, s.issued, s.lost, s.issues FROM bookrec b "
+                             "JOIN bookstat s ON s.bno=b.bno WHERE b.bno=%s LIMIT 1", (bno,))
+        return rows[0] if rows else None
+
+    def popular(self, limit=10):
+        return self.fetchall("SELECT s.bno, b.bname, s.issues FROM bookstat s JOIN bookrec b ON b.bno=s.bno "
+                             "ORDER BY s.issues DESC LIMIT %s", (limit,))
+
+    def overdue(self, cutoff):
+        """Open issues made before `cutoff`, oldest first."""
+        return self.fetchall("SELECT bno, mno, dos FROM rec WHERE stat='Reading' AND dos<%s ORDER BY dos",
+                             (cutoff,))
+
+    def lost_holders(self):
+        return self.fetchall("SELECT mno, bno, dos FROM rec WHERE stat='Lost' ORDER BY mno")
+
+
+class MySQLStorage(Storage):
+    """Storage on a MySQL server through mysql.connector."""
+
+    LOCK = ' FOR UPDATE'
+    RETURN_SQL = "UPDATE rec SET stat=%s WHERE bno=%s AND mno=%s AND stat='Reading' LIMIT 1"
+
+    def create_index(self, name, table, columns):
+        # MySQL has no CREATE INDEX IF NOT EXISTS
+        if not self.fetchall("SELECT 1 FROM information_schema.statistics WHERE table_schema=DATABASE() "
+                             "AND table_name=%s AND index_name=%s", (table, name)):
+            self.execute("CREATE INDEX {} ON {} ({})".format(name, table, columns))
+
+    def __init__(self, host='localhost', user='root', passwd='****', database='libt'):
+        import mysql.connector as ms
+        cobj = ms.connect(host=host, user=user, passwd=passwd)
+        cur = cobj.cursor()
+        cur.execute('CREATE DATABASE IF NOT EXISTS {}'.format(database))
+        cur.execute('USE {}'.format(database))
+        cur.close()
+        super().__init__(cobj)
+
+
+class SQLiteStorage(Storage):
+    """Storage in a local SQLite file, for tests, demos and load runs."""
+
+    param = '?'
+    RETURN_SQL = ("UPDATE rec SET stat=%s WHERE rowid=(SELECT rowid FROM rec "
+                  "WHERE bno=%s AND mno=%s AND stat='Reading' LIMIT 1)")
+
+    def __init__(self, path='libt.db', timeout=30):
+        super().__init__(sqlite3.connect(path, timeout=timeout, check_same_thread=False))
+
+    def begin(self):
+        # Take the write lock before validating, so the checks still hold at commit.
+        self.cobj.execute('BEGIN IMMEDIATE')
+
+
+def placeholders(n):
+    return ', '.join(['%s'] * n)
+
+
+def open_storage(backend='mysql', **options):
+    """Open and initialise a backend by name ('mysql' or 'sqlite')."""
+    backends = {'mysql': MySQLStorage, 'sqlite': SQLiteStorage}
+    if backend not in backends:
+        raise ValueError("Unknown storage backend {!r}".format(backend))
+    storage = backends[backend](**options)
+    storage.create_schema()
+    return storage
@@ -0,0 +1,108 @@
+"""Run-length encoding codec, importable without PyQt5."""
+import re
+from instrumentation import timed
+
+PACK_MAGIC = "RLE1\n"
+ESCAPE = "\\"  # Marks a run character that would otherwise read as part of the count
+RUN = re.compile(r"(.)\1*", re.S)
+PACKED_RUN = re.compile(r"(\d+)(?:\\(.)|([^\d\\]))", re.S)
+
+
+class RLE:
+    def __init__(self):
+        self.encoding_steps = []  # Stores each step of the encoding process
+        self.original_size = 0    # Original text character count
+        self.compressed_size = 0  # Compressed text character count
+
+    @timed("RLE.encode", lambda self, text: len(text.encode("utf-8")))
+    def encode(self, text):
+        """Encodes input text using RLE and tracks compression steps"""
+        if not text:
+            return ""
+        
+        self.encoding_steps = []
+        self.original_size = len(text)  # Store original length
+
+        encoded = []  # List to hold encoded parts
+        current_char = text[0]
+        count = 1
+
+        # Iterate through characters to find consecutive runs
+        for char in text[1:]:
+            if char == current_char:
+                count += 1
+            else:
+                # Add encoded part and record step
+                encoded_part = f"{count}{current_char}"
+                encoded.append(encoded_part)
+                self.encoding_steps.append(f"'{current_char * count}' → '{encoded_part}'")
+                current_char = char
+                count = 1
+        
+        # Add the last character group
+        encoded_part = f"{count}{current_char}"
+        encoded.append(encoded_part)
+        self.encoding_steps.append(f"'{current_char * count}' → '{encoded_part}'")
+        
+        compressed = "".join(encoded)
+        self.compressed_size = len(compressed)  # Store compressed length
+        return compressed
+
+    @timed("RLE.decode", lambda self, encoded_text: len(encoded_text.encode("utf-8")))
+    def decode(self, encoded_text):
+        """Decodes valid RLE encoded text back to original"""
+        decoded = []
+        i = 0
+        
+        try:
+            while i < len(encoded_text):
+                # Extract count digits
+                count_str = ""
+                while i < len(encoded_text) and encoded_text[i].isdigit():
+                    count_str += encoded_text[i]
+                    i += 1
+
+                if i >= len(encoded_text):
+                    break
+
+                # Get character and repeat count
+                char = encoded_text[i]
+                count = int(count_str) if count_str else 1
+                decoded.append(char * count)
+                i += 1
+        except:
+            raise ValueError("Invalid RLE format")
+        
+        return "".join(decoded)
+
+    @staticmethod
+    def pack(text):
+        """Lossless RLE for arbitrary text, used for files.
+
+        encode/decode keep the GUI's readable "3a2b" form, which cannot tell
+        a digit run character from its count. Here every run is its count
+        followed by the character, with digits and the escape character
+        itself prefixed by a backslash.
+        """
+        parts = [PACK_MAGIC]
+        for match in RUN.finditer(text):
+            char = match.group(1)
+            escape = ESCAPE if char.isdigit() or char == ESCAPE else ""
+            parts.append(f"{match.end() - match.start()}{escape}{char}")
+        return "".join(parts)
+
+    @staticmethod
+    def unpack(packed):
+        """Decode text produced by pack, rejecting anything malformed."""
+        if not packed.startswith(PACK_MAGIC):
+            raise ValueError("Not a packed RLE file")
+        decoded = []
+        position = len(PACK_MAGIC)
+        for match in PACKED_RUN.finditer(packed, position):
+            if match.start() != position:
+                break
+            decoded.append((match.group(2) or match.group(3)) * int(match.group(1)))
+            position = match.end()
+        if position != len(packed):
+            raise ValueError(f"Invalid packed RLE data at offset {position}")
+        return "".join(decoded)
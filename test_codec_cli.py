@@ -0,0 +1,65 @@
+"""End-to-end tests for the command-line interface.
+
+    python -m pytest -q test_codec_cli.py
+"""
+import os
+
+import pytest
+
+from codec_cli import main
+
+FILES = {
+    "a.txt": "abc 123 aaaa\\\\x 99\n7\n",
+    os.path.join("sub", "b.txt"): "line one\r\nline 2\n\n\n" * 20,
+    "empty.txt": "",
+}
+
+
+@pytest.fixture
+def docs(tmp_path):
+    root = tmp_path / "docs"
+    for name, text in FILES.items():
+        (root / name).parent.mkdir(parents=True, exist_ok=True)
+        (root / name).write_bytes(text.encode("utf-8"))
+    return root
+
+
+def read_tree(root):
+    return {str(path.relative_to(root)): path.read_bytes() for path in root.rglob("*") if path.is_file()}
+
+
+@pytest.mark.parametrize('codec, workers', [("rle", "1"), ("huffman", "1"), ("huffman", "2")])
+def test_round_trip(tmp_path, docs, codec, workers):
+    packed, restored = str(tmp_path / "packed"), str(tmp_path / "restored")
+    assert main(["compress", str(docs), "-o", packed, "-c", codec, "-j", workers]) == 0
+    assert main(["decompress", packed, "-o", restored, "-c", codec, "-j", workers]) == 0
+    assert read_tree(tmp_path / "restored") == read_tree(docs)
+
+
+def test_codebook_round_trip(tmp_path, docs):
+    codebook, packed, restored = str(tmp_path / "docs.codebook"), str(tmp_path / "packed"), str(tmp_path / "restored")
+    assert main(["train", str(docs), "-o", codebook]) == 0
+    assert main(["compress", str(docs), "-o", packed, "--codebook", codebook, "-j", "1"]) == 0
+    assert main(["decompress", packed, "-o", restored, "--codebook", codebook, "-j", "1"]) == 0
+    assert read_tree(tmp_path / "restored") == read_tree(docs)
+
+
+def test_in_place_runs_never_overwrite_or_recompress(docs, capsys):
+    original = read_tree(docs)
+    assert main(["compress", str(docs), "-j", "1"]) == 0
+    # A second run skips the .huf files and refuses to replace the old ones
+    assert main(["compress", str(docs), "-j", "1"]) == 1
+    assert not any(name.endswith(".huf.huf") for name in read_tree(docs))
+    # Decompressing next to the archives would overwrite the originals
+    (docs / "a.txt").write_bytes(b"edited")
+    assert main(["decompress", str(docs), "-j", "1"]) == 1
+    assert "use --force" in capsys.readouterr().err
+    assert (docs / "a.txt").read_bytes() == b"edited"
+    assert main(["decompress", str(docs), "-j", "1", "--force"]) == 0
+    assert {name: data for name, data in read_tree(docs).items() if not name.endswith(".huf")} == original
+
+
+def test_corrupt_rle_file_fails(tmp_path):
+    (tmp_path / "bad.rle").write_bytes(b"RLE1\n3")
+    assert main(["decompress", str(tmp_path / "bad.rle"), "-c", "rle", "-o", str(tmp_path / "out")]) == 1
+    assert not (tmp_path / "out" / "bad").exists()
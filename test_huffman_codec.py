@@ -0,0 +1,137 @@
+"""Tests for the Huffman codec: seekable archives, codebooks and the incremental encoder.
+
+    python -m pytest -q test_huffman_codec.py
+"""
+import json
+import os
+import random
+from collections import Counter
+
+import pytest
+
+from huffman_codec import ESCAPE, HuffmanCodebook, HuffmanCoding, IncrementalHuffman, common_prefix, common_suffix
+
+
+SAMPLES = ["the quick brown fox jumps over the lazy dog\n", "a b c 1 2 3\n" * 5]
+
+
+@pytest.fixture
+def codebook_path(tmp_path):
+    path = str(tmp_path / "samples.codebook")
+    HuffmanCodebook.train(SAMPLES).save(path)
+    return path
+
+
+def random_edit(rnd, text, alphabet):
+    """Replace a random span of `text` (possibly empty) with a few random characters."""
+    start = rnd.randint(0, len(text))
+    end = min(len(text), start + rnd.choice((0, 0, 1, 3, 20)))
+    insert = "".join(rnd.choice(alphabet) for _ in range(rnd.choice((0, 1, 1, 2, 10))))
+    return text[:start] + insert + text[end:]
+
+
+def assert_matches_full_encode(live, text):
+    assert live.text == text
+    assert "".join(piece for piece, _ in live.blocks) == text
+    assert live.frequency == Counter(text)
+    assert live.encoded == live.huffman.encode(text)
+    if text:
+        assert live.huffman.decode(live.encoded) == text
+
+
+def test_common_prefix_and_suffix():
+    assert common_prefix("abcdef", "abcxef") == 3
+    assert common_prefix("", "abc") == 0
+    assert common_suffix("abcdef", "abcxef", 6) == 2
+    assert common_suffix("aaaa", "aaaaa", 4) == 4
+    assert common_suffix("aaaa", "aaaaa", 1) == 1
+
+
+@pytest.mark.parametrize('seed, alphabet, block_size', [
+    (0, "ab", 4),
+    (1, "abcde \n", 16),
+    (2, "abcdefghijklmnopqrstuvwxyz0123456789 ", 64),
+    (3, "aé中\U0001f600", 8),
+])
+def test_random_edits_match_full_encode(seed, alphabet, block_size):
+    rnd = random.Random(seed)
+    live, text = IncrementalHuffman(block_size), ""
+    for _ in range(1500):
+        text = random_edit(rnd, text, alphabet)
+        live.update(text)
+        assert_matches_full_encode(live, text)
+
+
+def test_update_reports_code_changes():
+    live = IncrementalHuffman(4)
+    assert live.update("aab") is True
+    assert live.update("aab") is False
+    assert live.update("aba") is False  # Same frequencies, only the blocks are re-encoded
+    assert_matches_full_encode(live, "aba")
+    live.update("")
+    assert_matches_full_encode(live, "")
+
+
+@pytest.mark.parametrize('block_size', [1, 3, 8, 64, 4096])
+def test_decode_range_matches_slicing(tmp_path, block_size):
+    rnd = random.Random(block_size)
+    for n, text in enumerate(["", "a", "aaaaaaaaa", "".join(rnd.choice("ab c\né中\U0001f600") for _ in range(700))]):
+        path = tmp_path / "{}.huf".format(n)
+        path.write_bytes(HuffmanCoding().compress(text, block_size))
+        assert HuffmanCoding().decompress(path.read_bytes()) == text
+        reader = HuffmanCoding()
+        for _ in range(200):
+            start, stop = rnd.randint(-5, len(text) + 5), rnd.randint(-5, len(text) + 5)
+            expected = text[max(start, 0):max(stop, 0)]
+            assert reader.decode_range(str(path), start, stop) == expected
+
+
+def test_decode_range_keeps_the_instance_tree(tmp_path):
+    path = tmp_path / "other.huf"
+    path.write_bytes(HuffmanCoding().compress("zzzz yyy xx w"))
+    huffman = HuffmanCoding()
+    encoded = huffman.compress("hello world")
+    codes = dict(huffman.codes)
+    assert huffman.decode_range(str(path), 2, 9) == "zz yyy "
+    assert huffman.codes == codes
+    assert huffman.decompress(encoded) == "hello world"
+    assert huffman.decode(huffman.encode("hello")) == "hello"
+
+
+def test_codebook_round_trip_with_unknown_characters(codebook_path):
+    codebook = HuffmanCodebook.load(codebook_path)
+    assert ESCAPE in codebook.codes and "Z" not in codebook.codes
+    for text in ["", "the fox", "Zebra é中\U0001f600 12\n", "ZZZZ"]:
+        assert codebook.decode(codebook.encode(text)) == text
+        assert codebook.unpack(codebook.pack(text)) == text
+    assert len(codebook.encode("Z")) == len(codebook.codes[ESCAPE]) + 21
+
+
+def test_codebook_load_is_cached_until_the_file_changes(codebook_path):
+    first = HuffmanCodebook.load(codebook_path)
+    assert HuffmanCodebook.load(codebook_path) is first
+    assert HuffmanCodebook.get(first.id) is first
+
+    other = HuffmanCodebook.train(["zzzz yyy xx w"])
+    other.save(codebook_path)
+    os.utime(codebook_path, ns=(0, 0))  # Differ even on coarse mtime clocks
+    reloaded = HuffmanCodebook.load(codebook_path)
+    assert reloaded is other and reloaded.id != first.id
+
+
+def test_codebook_rejects_mismatched_ids(codebook_path, tmp_path):
+    codebook = HuffmanCodebook.load(codebook_path)
+    with open(codebook_path, encoding="utf-8") as f:
+        data = json.load(f)
+    data["id"] = HuffmanCodebook.train(["something else"]).id
+    corrupt = str(tmp_path / "corrupt.codebook")
+    with open(corrupt, "w", encoding="utf-8") as f:
+        json.dump(data, f)
+    with pytest.raises(ValueError, match="corrupt"):
+        HuffmanCodebook.load(corrupt)
+
+    other = HuffmanCodebook.train(["other corpus"])
+    with pytest.raises(ValueError, match="different codebook"):
+        other.unpack(codebook.pack("the fox"))
+    with pytest.raises(ValueError, match="Not a codebook"):
+        codebook.unpack(b"HUF2" + codebook.pack("the fox")[4:])
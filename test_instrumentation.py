@@ -0,0 +1,64 @@
+"""Tests for the phase profiler.
+
+    python -m pytest -q test_instrumentation.py
+"""
+import sys
+import tracemalloc
+
+import pytest
+
+from instrumentation import Profiler
+
+
+@pytest.fixture
+def profiler():
+    profiler = Profiler()
+    yield profiler
+    profiler.disable()
+
+
+def test_records_phases(profiler):
+    with profiler.phase("idle"):
+        pass
+    assert profiler.records == []
+    profiler.enable(track_memory=True)
+    with profiler.phase("outer", 1000):
+        with profiler.phase("inner"):
+            data = [0] * 100000
+        del data
+    assert [r["phase"] for r in profiler.records] == ["inner", "outer"]
+    assert profiler.records[1]["peak_bytes"] >= profiler.records[0]["peak_bytes"] > 0
+    assert "outer:" in profiler.summary()
+
+
+def test_clear_replaces_an_active_cprofile(profiler, tmp_path):
+    profiler.enable(cprofile=True)
+    for _ in range(3):
+        profiler.clear()  # Two active profilers raise ValueError on 3.12+
+    profiler.disable()
+    profiler.export(str(tmp_path / "run.prof"))
+    assert (tmp_path / "run.prof").stat().st_size > 0
+
+
+def test_clear_does_not_restart_an_unrequested_cprofile(profiler):
+    profiler.enable(cprofile=True)
+    profiler.enable(cprofile=False)
+    profiler.clear()
+    assert profiler.cprofile is None
+    if sys.version_info >= (3, 12):
+        assert sys.monitoring.get_tool(sys.monitoring.PROFILER_ID) is None
+    with pytest.raises(RuntimeError):
+        profiler.export_cprofile("unused.prof")
+
+
+def test_leaves_tracemalloc_it_did_not_start(profiler):
+    tracemalloc.start()
+    try:
+        profiler.enable(track_memory=True)
+        profiler.disable()
+        assert tracemalloc.is_tracing()
+    finally:
+        tracemalloc.stop()
+    profiler.enable(track_memory=True)
+    profiler.disable()
+    assert not tracemalloc.is_tracing()
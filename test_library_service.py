@@ -0,0 +1,69 @@
+"""Tests for the circulation service's request handling, over a real socket.
+
+    python -m pytest -q test_library_service.py
+"""
+import asyncio
+import json
+
+import pytest
+
+from library_service import CirculationService
+from library_storage import open_storage
+
+
+@pytest.fixture
+def service(tmp_path):
+    path = str(tmp_path / 'libt.db')
+    db = open_storage('sqlite', path=path)
+    db.insert_book(1, 'Book 1', 'Author', 100, 1)
+    db.close()
+    service = CirculationService('sqlite', workers=2, path=path)
+    yield service
+    service.executor.shutdown()
+
+
+def exchange(service, requests):
+    """Send raw request lines to a running service and return the decoded replies."""
+    async def run():
+        server = await asyncio.start_server(service.serve_client, '127.0.0.1', 0)
+        async with server:
+            reader, writer = await asyncio.open_connection(*server.sockets[0].getsockname()[:2])
+            replies = []
+            for line in requests:
+                writer.write(line.encode() + b'\n')
+                await writer.drain()
+                replies.append(json.loads(await reader.readline()))
+            writer.close()
+            return replies
+    return asyncio.run(run())
+
+
+def test_circulation_requests(service):
+    replies = exchange(service, [
+        '{"op": "issue", "bno": 1, "mno": 3, "dos": "2024-05-01"}',
+        '{"op": "issue", "bno": 1, "mno": 4}',
+        '{"op": "return_batch", "bnos": [1, 2], "mno": 3}',
+    ])
+    assert replies[0] == {'ok': True}
+    assert replies[1] == {'ok': False, 'error': 'Book 1 not available'}
+    assert [r['ok'] for r in replies[2]['results']] == [True, False]
+
+
+@pytest.mark.parametrize('line, error', [
+    ('[1]', 'Request must be a JSON object'),
+    ('"issue"', 'Request must be a JSON object'),
+    ('{"op": ["issue"], "bno": 1, "mno": 3}', 'Unknown operation'),
+    ('{"op": "lend", "bno": 1, "mno": 3}', 'Unknown operation'),
+    ('{"op": "issue", "bno": 1}', 'Missing field mno'),
+    ('{"op": "issue", "bno": 1, "mno": null}', 'Missing field mno'),
+    ('{"op": "issue_batch", "mno": 3}', 'Missing field bnos'),
+    ('{"op": "issue", "bno": "one", "mno": 3}', 'Invalid request'),
+    ('{"op": "issue_batch", "bnos": 1, "mno": 3}', 'Invalid request'),
+    ('{"op": "issue", "bno": 1, "mno": 3, "dos": 20240501}', 'Invalid request'),
+    ('{"op": "issue", "bno": 1, "mno": 3, "dos": "yesterday"}', 'Invalid request'),
+    ('not json', 'Expecting value'),
+])
+def test_bad_requests_are_request_errors(service, line, error):
+    (reply,) = exchange(service, [line])
+    assert reply['ok'] is False
+    assert error in reply['error'] and 'Database error' not in reply['error']
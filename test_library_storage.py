@@ -0,0 +1,168 @@
+"""Circulation tests for the storage layer, run against SQLite.
+
+    python -m pytest -q test_library_storage.py
+"""
+import sqlite3
+import threading
+from datetime import date
+
+import pytest
+
+from library_storage import CirculationError, SQLiteStorage, open_storage
+
+DOS = date(2024, 5, 1)
+STOCK = {1: 2, 2: 1, 3: 0, 4: 5}
+
+
+@pytest.fixture
+def path(tmp_path):
+    db = open_storage('sqlite', path=str(tmp_path / 'libt.db'))
+    for bno, qty in STOCK.items():
+        db.insert_book(bno, 'Book {}'.format(bno), 'Author', 100, qty)
+    db.close()
+    return str(tmp_path / 'libt.db')
+
+
+@pytest.fixture
+def db(path):
+    db = open_storage('sqlite', path=path)
+    yield db
+    db.close()
+
+
+def assert_in_sync(db, totals=STOCK):
+    """bookstat matches rec, and shelf + issued + lost copies add up to each book's total."""
+    for bno, total in totals.items():
+        qty, issued, lost, issues = db.availability(bno)
+        counts = dict(db.fetchall("SELECT stat, COUNT(*) FROM rec WHERE bno=%s GROUP BY stat", (bno,)))
+        assert issued == counts.get('Reading', 0)
+        assert lost == counts.get('Lost', 0)
+        assert issues == sum(counts.values())
+        assert qty >= 0 and qty + issued + lost == total
+
+
+class FailingStorage(SQLiteStorage):
+    """Raises on the first statement touching bookstat, after bookrec and rec were written."""
+
+    def execute(self, query, args=(), commit=True):
+        if query.startswith('UPDATE bookstat'):
+            raise RuntimeError("connection lost")
+        return super().execute(query, args, commit)
+
+
+def test_issue_and_return(db):
+    db.issue_book(1, 7, DOS)
+    db.return_book(1, 7, 'Returned')
+    db.issue_book(1, 7, DOS)
+    db.return_book(1, 7, 'Lost')
+    with pytest.raises(CirculationError):
+        db.issue_book(3, 7, DOS)
+    with pytest.raises(CirculationError):
+        db.return_book(2, 7)
+    assert db.availability(1) == (1, 0, 1, 2)
+    assert_in_sync(db)
+
+
+def test_batch_reports_each_book(db):
+    results = db.issue_books(7, [1, 3, 9, 1, 2], DOS)
+    assert [r['ok'] for r in results] == [True, False, False, False, True]
+    assert_in_sync(db)
+    results = db.return_books(7, [2, 4, 1], 'Returned')
+    assert [r['ok'] for r in results] == [True, False, True]
+    assert db.availability(1) == (2, 0, 0, 1)
+    assert_in_sync(db)
+
+
+@pytest.mark.parametrize('batch', [
+    lambda db: db.issue_books(7, [1, 2, 4], DOS),
+    lambda db: db.return_books(7, [1, 4], 'Returned'),
+])
+def test_failed_batch_writes_nothing(path, db, batch):
+    db.issue_books(7, [1, 4], DOS)
+    before = (db.fetchall("SELECT * FROM bookrec ORDER BY bno"), db.fetchall("SELECT * FROM rec ORDER BY bno"),
+              db.fetchall("SELECT * FROM bookstat ORDER BY bno"))
+    failing = FailingStorage(path)
+    with pytest.raises(RuntimeError):
+        batch(failing)
+    failing.close()
+    after = (db.fetchall("SELECT * FROM bookrec ORDER BY bno"), db.fetchall("SELECT * FROM rec ORDER BY bno"),
+             db.fetchall("SELECT * FROM bookstat ORDER BY bno"))
+    assert after == before
+    assert_in_sync(db)
+
+
+def test_update_book_keeps_issued_copies(db):
+    db.issue_books(7, [4], DOS)
+    db.issue_book(4, 8, DOS)
+    assert db.update_book(4, 'Book 4', 'Author', 120, 6) == 1
+    assert db.availability(4)[:2] == (4, 2)
+    with pytest.raises(CirculationError):
+        db.update_book(4, 'Book 4', 'Author', 120, 1)
+    assert db.availability(4)[:2] == (4, 2)
+    assert_in_sync(db, {**STOCK, 4: 6})
+
+
+def test_old_database_gets_shelf_stock(tmp_path):
+    path = str(tmp_path / 'old.db')
+    old = sqlite3.connect(path)
+    # Layout from before bookstat, when bookrec.qty held the copies purchased
+    old.execute('CREATE TABLE bookrec (bno int(10), bname varchar(100), auth varchar(100), price int(10), qty int(10))')
+    old.execute('CREATE TABLE rec (bno int(5), mno varchar(50), dos date, stat varchar(20))')
+    old.executemany('INSERT INTO bookrec VALUES (?, ?, ?, ?, ?)', [(1, 'Book 1', 'Author', 100, 2),
+                                                                   (2, 'Book 2', 'Author', 100, 3)])
+    old.executemany('INSERT INTO rec VALUES (?, ?, ?, ?)', [(1, 7, '2024-05-01', 'Reading'),
+                                                           (1, 8, '2024-05-01', 'Reading'),
+                                                           (2, 7, '2024-01-01', 'Lost'),
+                                                           (2, 8, '2024-01-01', 'Returned')])
+    old.commit()
+    old.close()
+
+    db = open_storage('sqlite', path=path)
+    assert db.availability(1) == (0, 2, 0, 2)
+    assert db.availability(2) == (2, 0, 1, 2)
+    assert_in_sync(db, {1: 2, 2: 3})
+    db.close()
+    # Reopening must not take the copies off a second time
+    db = open_storage('sqlite', path=path)
+    assert db.availability(1) == (0, 2, 0, 2)
+    db.return_books(7, [1], 'Returned')
+    db.return_book(1, 8, 'Returned')
+    assert db.availability(1) == (2, 0, 0, 2)
+    assert_in_sync(db, {1: 2, 2: 3})
+    db.close()
+
+
+def test_concurrent_desks_never_over_issue(path):
+    desks, issued, errors = 20, [], []
+    barrier = threading.Barrier(desks)
+
+    def desk(mno):
+        db = open_storage('sqlite', path=path)
+        try:
+            barrier.wait()
+            for _ in range(3):
+                try:
+                    if mno % 2:
+                        db.issue_book(4, mno, DOS)
+                        issued.append(4)
+                    else:
+                        issued.extend(r['bno'] for r in db.issue_books(mno, [1, 2, 4], DOS) if r['ok'])
+                except CirculationError:
+                    pass
+        except Exception as e:
+            errors.append(e)
+        finally:
+            db.close()
+
+    threads = [threading.Thread(target=desk, args=(mno,)) for mno in range(desks)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert not errors
+    assert sorted(issued) == [1] * STOCK[1] + [2] * STOCK[2] + [4] * STOCK[4]
+    db = open_storage('sqlite', path=path)
+    assert all(db.availability(bno)[0] == 0 for bno in STOCK)
+    assert_in_sync(db)
+    db.close()
@@ -0,0 +1,37 @@
+"""Tests for the lossless packed RLE format used for files.
+
+    python -m pytest -q test_rle_codec.py
+"""
+import random
+
+import pytest
+
+from rle_codec import PACK_MAGIC, RLE
+
+
+@pytest.mark.parametrize('text', [
+    "", "a", "aaab", "abc 123 aaa", "1111122", "\\\\\\x\\1", "line\n\n\nnext\r\n", "é中\U0001f600\U0001f600", "9" * 120,
+])
+def test_pack_round_trip(text):
+    assert RLE.unpack(RLE.pack(text)) == text
+
+
+def test_pack_escapes_digits_and_backslashes():
+    assert RLE.pack("aaa11\\") == PACK_MAGIC + "3a2\\11\\\\"
+    assert RLE.pack("\n\n") == PACK_MAGIC + "2\n"
+
+
+def test_pack_round_trip_random():
+    rnd = random.Random(0)
+    for _ in range(500):
+        text = "".join(rnd.choice("a1\\\n 0") * rnd.randint(1, 12) for _ in range(rnd.randint(0, 20)))
+        assert RLE.unpack(RLE.pack(text)) == text
+
+
+@pytest.mark.parametrize('packed', [
+    "3a", "RLE1", PACK_MAGIC + "a", PACK_MAGIC + "3", PACK_MAGIC + "31", PACK_MAGIC + "3\\", PACK_MAGIC + "2a\\b",
+    PACK_MAGIC + "2a3",
+])
+def test_unpack_rejects_malformed_input(packed):
+    with pytest.raises(ValueError):
+        RLE.unpack(packed)